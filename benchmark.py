@@ -14,7 +14,6 @@ from typing import Optional
 
 import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
 import streamlit as st
 
 logger = logging.getLogger(__name__)
@@ -121,6 +120,7 @@ def calculate_benchmark_returns(snapshots: list[dict], days: int = 90) -> dict:
 
 def render_benchmark_comparison(snapshots: list[dict]):
     """Benchmark karşılaştırma grafiklerini render et."""
+    import plotly.graph_objects as go
     
     st.markdown("### 📊 Benchmark Karşılaştırma")
     
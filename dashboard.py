@@ -18,12 +18,11 @@ Tarih: Ocak 2026
 import json
 import logging
 from datetime import datetime, timedelta
+from operator import attrgetter
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import streamlit as st
 import yaml
 
@@ -45,15 +44,13 @@ from supabase_client import (
     handle_oauth_callback,
     logout,
     save_portfolio_config,
-    load_portfolio_config,
     save_snapshot,
-    load_snapshots,
-    should_take_weekly_snapshot,
+    load_snapshot_summary,
+    load_user_bootstrap,
+    take_weekly_snapshot_if_needed,
     delete_all_snapshots,
 )
 
-from benchmark import render_benchmark_tab
-
 # =============================================================================
 # SAYFA AYARLARI
 # =============================================================================
@@ -169,21 +166,40 @@ def save_config_to_cloud(config: PortfolioConfig) -> bool:
     return save_portfolio_config(user['id'], config_dict)
 
 
-def load_config_from_cloud() -> PortfolioConfig:
-    user = get_current_user()
-    if not user:
-        return PortfolioConfig()
-    config_dict = load_portfolio_config(user['id'])
-    if config_dict:
-        return dict_to_config(config_dict)
-    return PortfolioConfig()
+def _current_week() -> int:
+    return datetime.now().isocalendar()[1]
+
+
+def _set_snapshot_week(has_snapshot: bool) -> None:
+    # Hafta numarasiyla tutulur; hafta donunce bayrak kendiliginden gecersiz olur
+    st.session_state.snapshot_week = _current_week() if has_snapshot else None
 
 
 def load_snapshots_from_cloud() -> list:
     user = get_current_user()
     if not user:
         return []
-    return load_snapshots(user['id'])
+    # Ayni sorgudan haftalik snapshot durumu da cikar; take_snapshot_if_needed
+    # bu hafta icin tekrar sorgu atmaz
+    summary = load_snapshot_summary(user['id'])
+    _set_snapshot_week(summary['current_week_has_snapshot'])
+    return summary['snapshots']
+
+
+def bootstrap_from_cloud() -> None:
+    """Config, portfoy ve snapshot'lari tek istekle session state'e yukle."""
+    user = get_current_user()
+    if not user:
+        st.session_state.config = PortfolioConfig()
+        st.session_state.portfolio = Portfolio(st.session_state.config)
+        st.session_state.snapshots = []
+        return
+    data = load_user_bootstrap(user['id'])
+    config_dict = data['config']
+    st.session_state.config = dict_to_config(config_dict) if config_dict else PortfolioConfig()
+    st.session_state.portfolio = Portfolio(st.session_state.config)
+    st.session_state.snapshots = data['snapshots']
+    _set_snapshot_week(data['current_week_has_snapshot'])
 
 
 def save_snapshot_to_cloud(total_value: float, assets: dict) -> bool:
@@ -193,26 +209,36 @@ def save_snapshot_to_cloud(total_value: float, assets: dict) -> bool:
     return save_snapshot(user['id'], total_value, assets)
 
 
+_SNAPSHOT_FIELDS = attrgetter('code', 'value_try', 'shares', 'current_price')
+
+
+def build_assets_summary(portfolio: Portfolio) -> dict:
+    # attrgetter C tarafinda calisir; varlik basina 4 ayri attribute lookup yapilmaz
+    return {c: {'value_try': v, 'shares': s, 'price': p}
+            for c, v, s, p in map(_SNAPSHOT_FIELDS, (a for a in portfolio.assets if a.is_valid))}
+
+
 def take_snapshot_if_needed(portfolio: Portfolio) -> bool:
-    user = get_current_user()
-    if not user or not should_take_weekly_snapshot(user['id']):
+    # Cuma disinda ve bu hafta snapshot'i bilinen oturumlarda ne varlik
+    # ozeti kurulur ne de Supabase'e gidilir
+    if datetime.now().weekday() != 4:
         return False
-    if not portfolio or not portfolio.assets:
+    if st.session_state.get('snapshot_week') == _current_week():
+        return False
+    user = get_current_user()
+    if not user or not portfolio or not portfolio.assets:
         return False
     
-    assets_summary = {}
-    for asset in portfolio.assets:
-        if asset.is_valid:
-            assets_summary[asset.code] = {
-                'value_try': asset.value_try,
-                'shares': asset.shares,
-                'price': asset.current_price
-            }
-    
-    success = save_snapshot_to_cloud(portfolio.metrics.total_value_try, assets_summary)
-    if success:
+    taken = take_weekly_snapshot_if_needed(
+        user['id'], portfolio.metrics.total_value_try, build_assets_summary(portfolio))
+    if taken is None:
+        # Hata: durum bilinmiyor, bir sonraki yenilemede tekrar denenir
+        return False
+    # Kaydedildi ya da bu hafta zaten vardi; iki durumda da hafta tamam
+    _set_snapshot_week(True)
+    if taken:
         st.session_state.snapshots = load_snapshots_from_cloud()
-    return success
+    return taken
 
 
 # =============================================================================
@@ -255,9 +281,7 @@ def render_sidebar():
             with col1:
                 if st.button("Yukle", use_container_width=True):
                     with st.spinner("Yukleniyor..."):
-                        st.session_state.config = load_config_from_cloud()
-                        st.session_state.portfolio = Portfolio(st.session_state.config)
-                        st.session_state.snapshots = load_snapshots_from_cloud()
+                        bootstrap_from_cloud()
                         st.success("OK")
             with col2:
                 if st.button("Guncelle", use_container_width=True, type="primary"):
@@ -355,6 +379,8 @@ def render_charts(portfolio):
     if valid_df.empty:
         return
     
+    import plotly.express as px
+    
     st.markdown("### Portfolio Dagilimi")
     
     col1, col2 = st.columns(2)
@@ -367,7 +393,7 @@ def render_charts(portfolio):
     
     with col2:
         if 'Tur' in valid_df.columns:
-            type_df = valid_df.groupby('Tur')['Deger_TRY'].sum().reset_index()
+            type_df = valid_df.groupby('Tur', observed=True)['Deger_TRY'].sum().reset_index()
             fig = px.pie(type_df, values='Deger_TRY', names='Tur', title='Tur Dagilimi',
                         color_discrete_sequence=PIE_COLORS)
             fig.update_traces(textposition='inside', textinfo='percent+label')
@@ -388,6 +414,8 @@ def render_risk_analysis_page():
     
     valid_assets = [a for a in portfolio.assets if a.is_valid]
     if valid_assets:
+        import plotly.graph_objects as go
+        
         st.markdown("### Position Sizing")
         
         position_data = [{'Kod': a.code, 'Agirlik': a.actual_weight} for a in valid_assets]
@@ -414,18 +442,20 @@ def render_weekly_report_page():
         st.info("Henuz snapshot yok.")
         if st.session_state.portfolio and st.session_state.portfolio.assets:
             if st.button("Manuel Snapshot Al", type="primary"):
-                assets_summary = {a.code: {'value_try': a.value_try, 'shares': a.shares, 'price': a.current_price} 
-                                 for a in st.session_state.portfolio.assets if a.is_valid}
+                assets_summary = build_assets_summary(st.session_state.portfolio)
                 if save_snapshot_to_cloud(st.session_state.portfolio.metrics.total_value_try, assets_summary):
                     st.success("Snapshot alindi!")
                     st.session_state.snapshots = load_snapshots_from_cloud()
                     st.rerun()
         return
     
-    df = pd.DataFrame([{
-        'Tarih': datetime.fromisoformat(s['created_at'].replace('Z', '+00:00')).strftime('%Y-%m-%d'),
-        'Deger': float(s['total_value_try'])
-    } for s in snapshots])
+    import plotly.graph_objects as go
+    
+    raw = pd.DataFrame(snapshots)
+    df = pd.DataFrame({
+        'Tarih': pd.to_datetime(raw['created_at'], utc=True, format='ISO8601').dt.strftime('%Y-%m-%d'),
+        'Deger': raw['total_value_try'].astype(float)
+    })
     
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=df['Tarih'], y=df['Deger'], mode='lines+markers',
@@ -438,6 +468,8 @@ def render_weekly_report_page():
 # =============================================================================
 
 def render_benchmark_page():
+    from benchmark import render_benchmark_tab
+    
     st.markdown("## Benchmark Karsilastirma")
     render_benchmark_tab(st.session_state.snapshots)
 
@@ -672,7 +704,11 @@ def render_asset_management_page():
         if st.button("Tumunu Kaydet", type="primary", use_container_width=True):
             if save_config_to_cloud(config):
                 st.success("Portfolio kaydedildi!")
-                st.session_state.portfolio = Portfolio(config)
+                # Fiyatlar degismedi; sadece adet/hedef degisikliklerini uygula
+                if st.session_state.portfolio:
+                    st.session_state.portfolio.update_config(config)
+                else:
+                    st.session_state.portfolio = Portfolio(config)
             else:
                 st.error("Kaydetme hatasi!")
     with col2:
@@ -701,6 +737,7 @@ def render_settings_page():
     if st.button("Tum Snapshot'lari Sil", type="secondary"):
         if user and delete_all_snapshots(user['id']):
             st.session_state.snapshots = []
+            _set_snapshot_week(False)
             st.success("Silindi!")
             st.rerun()
 
@@ -746,9 +783,7 @@ def main():
         return
     
     if st.session_state.config is None:
-        st.session_state.config = load_config_from_cloud()
-        st.session_state.portfolio = Portfolio(st.session_state.config)
-        st.session_state.snapshots = load_snapshots_from_cloud()
+        bootstrap_from_cloud()
     
     render_sidebar()
     
@@ -72,21 +72,30 @@ retry_strategy = Retry(
     status_forcelist=[500, 502, 503, 504],
     respect_retry_after_header=True
 )
-adapter = HTTPAdapter(max_retries=retry_strategy)
+# Havuz, paralel çekimlerde (fetch_all_prices) bağlantı atılmayacak kadar büyük
+adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=retry_strategy)
 _session.mount("http://", adapter)
 _session.mount("https://", adapter)
+_session.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Connection': 'keep-alive'
+})
 
 # =============================================================================
 # STANDART IMPORTS
 # =============================================================================
 
+import atexit
 import json
 import logging
+import sqlite3
+import threading
 import time
 import urllib.request
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, NamedTuple, Optional
 
 import numpy as np
 import pandas as pd
@@ -113,82 +122,228 @@ except ImportError:
     except ImportError:
         TEFAS_CRAWLER_AVAILABLE = False
 
+# orjson import (opsiyonel - cache serileştirmesi için)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 # Rate limit tracking
-_last_yahoo_call = 0
 _yahoo_call_count = 0
-_YAHOO_MIN_INTERVAL = 1.5  # Minimum 1.5 saniye arası
+_yahoo_count_lock = threading.Lock()
+_YAHOO_MIN_INTERVAL = 1.5  # Sürekli yükte ortalama istek aralığı (saniye)
+_YAHOO_BURST = 5
 
+# Sağlayıcı başına paralel istek sınırı
+_TEFAS_WORKERS = 8
+_CRYPTO_WORKERS = 4
+_YAHOO_WORKERS = 2  # Hız yine _yahoo_bucket ile sınırlanır
 
-def _rate_limit_yahoo():
-    """Yahoo API rate limit koruması."""
-    global _last_yahoo_call, _yahoo_call_count
+# Sağlayıcı havuzları süreç boyunca paylaşılır: her toplu çekimde thread
+# oluşturma maliyeti ödenmez ve eşzamanlı oturumlar aynı sınırı paylaşır
+_EXECUTOR_WORKERS = {'tefas': _TEFAS_WORKERS, 'crypto': _CRYPTO_WORKERS, 'yahoo': _YAHOO_WORKERS}
+_EXECUTORS: dict = {}
+_executor_lock = threading.Lock()
+
+
+def _get_executor(provider: str) -> ThreadPoolExecutor:
+    """Sağlayıcının paylaşılan thread havuzunu döndür (ilk çağrıda oluşturulur)."""
+    executor = _EXECUTORS.get(provider)
+    if executor is None:
+        with _executor_lock:
+            executor = _EXECUTORS.get(provider)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=_EXECUTOR_WORKERS[provider],
+                    thread_name_prefix=f"fetch-{provider}"
+                )
+                _EXECUTORS[provider] = executor
+    return executor
+
+
+class TokenBucket:
+    """
+    Token bucket hız sınırlayıcı (thread-safe).
     
-    now = time.time()
-    elapsed = now - _last_yahoo_call
+    Kova doluyken `capacity` kadar istek beklemeden geçer; kova boşalınca
+    istekler `rate` token/sn hızına göre bekletilir.
+    """
     
-    if elapsed < _YAHOO_MIN_INTERVAL:
-        sleep_time = _YAHOO_MIN_INTERVAL - elapsed
-        time.sleep(sleep_time)
+    def __init__(self, capacity: int, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = float(capacity)
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        # Token kilit altında ayrılır (kova eksiye düşebilir); bekleme kilit
+        # dışında yapılır, böylece bekleyenler birbirini bloklamadan sıradaki
+        # slotlarını alır
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        
+        if wait > 0:
+            time.sleep(wait)
+
+
+_yahoo_bucket = TokenBucket(capacity=_YAHOO_BURST, rate=1.0 / _YAHOO_MIN_INTERVAL)
+
+
+def _rate_limit_yahoo():
+    """Yahoo API rate limit koruması."""
+    global _yahoo_call_count
     
-    _last_yahoo_call = time.time()
-    _yahoo_call_count += 1
+    _yahoo_bucket.acquire()
+    with _yahoo_count_lock:
+        _yahoo_call_count += 1
 
 
 # =============================================================================
 # CACHE
 # =============================================================================
 
+def _dumps(obj: Any) -> str:
+    """Cache kaydını JSON metnine çevir (orjson varsa onunla)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, ensure_ascii=False, default=str, separators=(',', ':'))
+
+
+def _loads(text) -> Any:
+    """JSON metnini (str veya bytes) çöz."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _to_epoch(value) -> float:
+    """Zaman damgasını epoch saniyeye çevir (eski ISO kayıtlar dahil)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+_CACHE_FLUSH_INTERVAL = 1.0  # saniye
+
+
+class CacheEntry(NamedTuple):
+    """DataCache.get sonucu."""
+    data: Any
+    is_stale: bool
+
+
 class DataCache:
-    """JSON tabanlı önbellek."""
+    """
+    SQLite (WAL) tabanlı önbellek.
+    
+    Her set() tek satırlık INSERT OR REPLACE'tir; eski JSON önbellekteki gibi
+    tüm dosya yeniden yazılmaz. Eski portfolio_cache.json varsa ilk açılışta
+    bir kez içeri aktarılır.
+    """
     
     def __init__(self, cache_dir: str = ".cache", ttl_seconds: int = 3600):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
         self.ttl_seconds = ttl_seconds
         self.cache_file = self.cache_dir / "portfolio_cache.json"
-        self._cache: dict = self._load_cache()
+        self.db_file = self.cache_dir / "cache.db"
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._last_flush = 0.0
+        self._db = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, timestamp REAL NOT NULL, data TEXT NOT NULL, ttl INTEGER)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(cache)")}
+        if 'ttl' not in columns:
+            self._db.execute("ALTER TABLE cache ADD COLUMN ttl INTEGER")
+        self._db.commit()
+        self._import_legacy_json()
     
-    def _load_cache(self) -> dict:
-        if self.cache_file.exists():
+    def _import_legacy_json(self) -> None:
+        """Eski JSON önbelleği boş veritabanına aktar."""
+        if not self.cache_file.exists():
+            return
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM cache LIMIT 1").fetchone():
+                return
             try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
-        return {}
+                legacy = _loads(self.cache_file.read_bytes())
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO cache (key, timestamp, data) VALUES (?, ?, ?)",
+                    [
+                        (key, _to_epoch(entry.get('timestamp')), _dumps(entry.get('data')))
+                        for key, entry in legacy.items() if isinstance(entry, dict)
+                    ]
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.warning(f"Eski cache aktarılamadı: {e}")
     
-    def _save_cache(self) -> None:
+    def get(self, key: str, ttl_override: Optional[int] = None) -> Optional[CacheEntry]:
+        """
+        Kaydı döndür. Tazelik için önce kaydın kendi TTL'i, sonra ttl_override,
+        en son genel ttl_seconds kullanılır.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT timestamp, data, ttl FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        timestamp, data, ttl = row
+        if ttl is None:
+            ttl = ttl_override if ttl_override is not None else self.ttl_seconds
+        is_stale = time.time() - _to_epoch(timestamp) >= ttl
+        return CacheEntry(_loads(data), is_stale)
+    
+    def set(self, key: str, data: dict, ttl_override: Optional[int] = None) -> None:
+        """Kaydı yaz; ttl_override verilirse bu kayıt için genel TTL yerine kullanılır."""
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self._cache, f, indent=2, ensure_ascii=False, default=str)
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache (key, timestamp, data, ttl) VALUES (?, ?, ?, ?)",
+                    (key, time.time(), _dumps(data), ttl_override)
+                )
+                self._dirty = True
+                # Commit'ler en fazla saniyede bir; kalan yazımlar flush() ile
+                if time.time() - self._last_flush > _CACHE_FLUSH_INTERVAL:
+                    self.flush()
         except Exception as e:
             logger.error(f"Cache kaydetme hatası: {e}")
     
-    def get(self, key: str) -> Optional[dict]:
-        if key not in self._cache:
-            return None
-        entry = self._cache[key]
-        entry['is_stale'] = True
-        try:
-            cached_time = datetime.fromisoformat(entry.get('timestamp', '2000-01-01'))
-            if datetime.now() - cached_time < timedelta(seconds=self.ttl_seconds):
-                entry['is_stale'] = False
-        except:
-            pass
-        return entry
-    
-    def set(self, key: str, data: dict) -> None:
-        self._cache[key] = {
-            'timestamp': datetime.now().isoformat(),
-            'data': data,
-            'is_stale': False
-        }
-        self._save_cache()
+    def flush(self) -> None:
+        """Bekleyen yazımları diske işle."""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                self._db.commit()
+                self._dirty = False
+                self._last_flush = time.time()
+            except Exception as e:
+                logger.error(f"Cache flush hatası: {e}")
 
 
 _cache = DataCache()
+atexit.register(_cache.flush)
 
 def get_cache() -> DataCache:
     return _cache
@@ -198,6 +353,50 @@ def set_cache_ttl(ttl_seconds: int) -> None:
     _cache.ttl_seconds = ttl_seconds
 
 
+# Varlık sınıfı başına tazelik süresi (saniye): kripto dakikalar içinde
+# değişir, TEFAS fiyatı günde bir kez kesinleşir
+_CLASS_TTLS = {'CRYPTO': 120, 'US': 900, 'TEFAS': 21600, 'USDTRY': 1800}
+
+_ISTANBUL_TZ = timezone(timedelta(hours=3))
+_TEFAS_FINAL_HOUR = 19  # Fon fiyatları bu saatten sonra kesinleşmiş kabul edilir
+
+
+def _tefas_ttl() -> int:
+    """Şu an çekilen TEFAS fiyatının geçerlilik süresi."""
+    now = datetime.now(_ISTANBUL_TZ)
+    final = now.replace(hour=_TEFAS_FINAL_HOUR, minute=0, second=0, microsecond=0)
+    if now < final:
+        # Gün sonu fiyatı yayınlanınca yeniden çekilsin
+        return min(_CLASS_TTLS['TEFAS'], int((final - now).total_seconds()))
+    # Kesinleşmiş fiyat: en az gün sonuna kadar tekrar çekme
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(_CLASS_TTLS['TEFAS'], int((midnight - now).total_seconds()))
+
+
+def history_ttl(asset_type: str) -> int:
+    """
+    Varlık tipinin (TEFAS / US_STOCK / CRYPTO) geçmiş verisi için tazelik
+    süresi. Kripto ve seans içi ABD hisselerinde son günlük bar gün içinde
+    değiştiğinden fiyat TTL'leri kullanılır.
+    """
+    if asset_type == 'TEFAS':
+        return _tefas_ttl()
+    return _CLASS_TTLS['US' if asset_type == 'US_STOCK' else 'CRYPTO']
+
+
+# Başarısız çekimler kısa süre hatırlanır; bozuk/delist sembol her
+# yenilemede kaynağı tekrar yormaz
+_NEGATIVE_TTL = 300
+
+
+def _recent_failure(cache_key: str) -> Optional[dict]:
+    """Son _NEGATIVE_TTL saniyede başarısız olan çekimin hata kaydı."""
+    entry = _cache.get(f"{cache_key}_err")
+    if entry and not entry.is_stale:
+        return entry.data
+    return None
+
+
 # =============================================================================
 # USD/TRY
 # =============================================================================
@@ -207,9 +406,9 @@ def fetch_usd_try_rate(timeout: int = 30) -> float:
     cache_key = "USDTRY"
     
     # Önce cache kontrol et (fresh ise kullan)
-    cached = _cache.get(cache_key)
-    if cached and 'data' in cached and not cached.get('is_stale', True):
-        rate = float(cached['data'].get('rate', 35.5))
+    cached = _cache.get(cache_key, ttl_override=_CLASS_TTLS['USDTRY'])
+    if cached and not cached.is_stale:
+        rate = float(cached.data.get('rate', 35.5))
         logger.info(f"USD/TRY (cache): {rate:.4f}")
         return rate
     
@@ -234,13 +433,13 @@ def fetch_usd_try_rate(timeout: int = 30) -> float:
         
         # Fallback: direkt API dene
         try:
-            time.sleep(2)
+            _rate_limit_yahoo()
             url = "https://query1.finance.yahoo.com/v8/finance/chart/USDTRY=X?interval=1d&range=5d"
             response = _session.get(url, timeout=timeout)
             if response.status_code == 200:
                 data = response.json()
                 closes = data['chart']['result'][0]['indicators']['quote'][0]['close']
-                rate = float([c for c in closes if c is not None][-1])
+                rate = float(next(c for c in reversed(closes) if c is not None))
                 _cache.set(cache_key, {'rate': rate})
                 logger.info(f"USD/TRY (API): {rate:.4f}")
                 return rate
@@ -250,8 +449,8 @@ def fetch_usd_try_rate(timeout: int = 30) -> float:
             logger.warning(f"Yahoo API hatası: {e2}")
         
         # Cache fallback (stale olsa bile)
-        if cached and 'data' in cached:
-            rate = float(cached['data'].get('rate', 35.5))
+        if cached:
+            rate = float(cached.data.get('rate', 35.5))
             logger.info(f"USD/TRY (stale cache): {rate:.4f}")
             return rate
         return 35.5
@@ -261,15 +460,48 @@ def fetch_usd_try_rate(timeout: int = 30) -> float:
 # ABD HİSSELERİ - YFINANCE
 # =============================================================================
 
+_NAME_TTL = 7 * 24 * 3600  # Şirket adları nadiren değişir
+
+
+def _us_stock_name(ticker: str, meta: Optional[dict] = None, lookup: bool = False) -> str:
+    """
+    Hisse adını döndür: önce NAME_{ticker} cache'i, yoksa fiyat isteğiyle
+    zaten gelen chart metadata'sı. Ayrı bir stock.info isteği yapılmaz;
+    lookup=True ise metadata eksikken (7 günde en fazla bir kez) chart
+    metadata'sı çekilir.
+    """
+    cache_key = f"NAME_{ticker}"
+    cached = _cache.get(cache_key, ttl_override=_NAME_TTL)
+    if cached and not cached.is_stale:
+        return cached.data.get('name', ticker)
+    
+    if meta is None and lookup:
+        _rate_limit_yahoo()
+        try:
+            meta = yf.Ticker(ticker).history_metadata
+        except Exception:
+            meta = None
+    
+    name = (meta or {}).get('shortName') or (meta or {}).get('longName')
+    if name:
+        _cache.set(cache_key, {'name': name}, ttl_override=_NAME_TTL)
+        return name
+    return cached.data.get('name', ticker) if cached else ticker
+
+
 def fetch_us_stock_price(ticker: str, timeout: int = 30) -> dict:
     """ABD hisse fiyatını yfinance ile çek."""
     cache_key = f"US_{ticker}"
     
     # Önce cache kontrol et
-    cached = _cache.get(cache_key)
-    if cached and 'data' in cached and not cached.get('is_stale', True):
-        logger.info(f"{ticker} (cache): ${cached['data'].get('current_price', 'N/A')}")
-        return cached['data']
+    cached = _cache.get(cache_key, ttl_override=_CLASS_TTLS['US'])
+    if cached and not cached.is_stale:
+        logger.info(f"{ticker} (cache): ${cached.data.get('current_price', 'N/A')}")
+        return cached.data
+    
+    failed = _recent_failure(cache_key)
+    if failed:
+        return cached.data if cached else failed
     
     _rate_limit_yahoo()
     
@@ -289,12 +521,12 @@ def fetch_us_stock_price(ticker: str, timeout: int = 30) -> dict:
         else:
             prev_week_price = float(hist['Close'].iloc[0])
         
-        name = ticker
+        # history() çağrısı metadata'yı da getirir; ek istek gerekmez
         try:
-            info = stock.info
-            name = info.get('shortName') or info.get('longName') or ticker
-        except:
-            pass
+            meta = stock.history_metadata
+        except Exception:
+            meta = None
+        name = _us_stock_name(ticker, meta)
         
         result = {
             'ticker': ticker,
@@ -319,7 +551,7 @@ def fetch_us_stock_price(ticker: str, timeout: int = 30) -> dict:
         
         # Fallback: Direkt Yahoo Finance API
         try:
-            time.sleep(1)
+            _rate_limit_yahoo()
             url = f"https://query1.finance.yahoo.com/v8/finance/chart/{ticker}?interval=1d&range=14d"
             response = _session.get(url, timeout=timeout)
             
@@ -333,8 +565,7 @@ def fetch_us_stock_price(ticker: str, timeout: int = 30) -> dict:
                     current_price = float(closes[-1])
                     prev_week_price = float(closes[-6]) if len(closes) >= 6 else float(closes[0])
                     
-                    meta = chart.get('meta', {})
-                    name = meta.get('shortName') or meta.get('longName') or ticker
+                    name = _us_stock_name(ticker, chart.get('meta', {}))
                     
                     result = {
                         'ticker': ticker,
@@ -356,12 +587,7 @@ def fetch_us_stock_price(ticker: str, timeout: int = 30) -> dict:
         except Exception as e2:
             logger.error(f"Yahoo API hatası ({ticker}): {e2}")
         
-        # Cache fallback
-        if cached and 'data' in cached:
-            logger.warning(f"Cache'den (stale) {ticker}")
-            return cached['data']
-        
-        return {
+        error_result = {
             'ticker': ticker,
             'name': ticker,
             'current_price': None,
@@ -370,6 +596,79 @@ def fetch_us_stock_price(ticker: str, timeout: int = 30) -> dict:
             'error': str(e),
             'timestamp': datetime.now().isoformat()
         }
+        _cache.set(f"{cache_key}_err", error_result, ttl_override=_NEGATIVE_TTL)
+        
+        # Cache fallback
+        if cached:
+            logger.warning(f"Cache'den (stale) {ticker}")
+            return cached.data
+        
+        return error_result
+
+
+def fetch_us_stocks_batch(tickers: list, timeout: int = 30) -> dict:
+    """
+    Birden fazla ABD hissesini tek yf.download çağrısıyla çek.
+    
+    Cache'i taze olanlar atlanır; toplu çekimde verisi gelmeyenler için
+    fetch_us_stock_price'a düşülür. Sonuç girdi sırasıyla döner.
+    """
+    results = {}
+    pending = []
+    for ticker in tickers:
+        cached = _cache.get(f"US_{ticker}", ttl_override=_CLASS_TTLS['US'])
+        if cached and not cached.is_stale:
+            results[ticker] = cached.data
+        elif _recent_failure(f"US_{ticker}"):
+            # Yakın zamanda başarısız oldu; tekil fonksiyon kaynağa gitmeden döner
+            results[ticker] = fetch_us_stock_price(ticker, timeout)
+        else:
+            pending.append(ticker)
+    
+    if pending:
+        _rate_limit_yahoo()
+        
+        try:
+            logger.info(f"yfinance toplu çekim: {', '.join(pending)}")
+            hist = yf.download(pending, period="14d", group_by='ticker',
+                               progress=False, threads=True, timeout=timeout)
+        except Exception as e:
+            logger.warning(f"yfinance toplu çekim hatası: {e}")
+            hist = pd.DataFrame()
+        
+        multi = isinstance(hist.columns, pd.MultiIndex)
+        tickers_in_hist = set(hist.columns.get_level_values(0)) if multi else set()
+        
+        for ticker in pending:
+            if multi:
+                closes = hist[ticker]['Close'].dropna() if ticker in tickers_in_hist else None
+            else:
+                closes = hist['Close'].dropna() if 'Close' in hist.columns else None
+            
+            if closes is None or closes.empty:
+                results[ticker] = fetch_us_stock_price(ticker, timeout)
+                continue
+            
+            current_price = float(closes.iloc[-1])
+            prev_week_price = float(closes.iloc[-6]) if len(closes) >= 6 else float(closes.iloc[0])
+            
+            # yf.download metadata döndürmez; isim NAME_ cache'inden gelir
+            name = _us_stock_name(ticker, lookup=True)
+            
+            result = {
+                'ticker': ticker,
+                'name': name,
+                'current_price': current_price,
+                'prev_week_price': prev_week_price,
+                'currency': 'USD',
+                'source': 'yfinance',
+                'timestamp': datetime.now().isoformat()
+            }
+            _cache.set(f"US_{ticker}", result)
+            logger.info(f"{ticker}: ${current_price:.2f}")
+            results[ticker] = result
+    
+    return {ticker: results[ticker] for ticker in tickers}
 
 
 def fetch_us_stock_history(ticker: str, days: int = 30) -> pd.DataFrame:
@@ -381,28 +680,51 @@ def fetch_us_stock_history(ticker: str, days: int = 30) -> pd.DataFrame:
         hist = stock.history(period=f"{days}d")
         
         if hist.empty:
-            time.sleep(1)
+            _rate_limit_yahoo()
             url = f"https://query1.finance.yahoo.com/v8/finance/chart/{ticker}?interval=1d&range={days}d"
-            response = _session.get(url, timeout=30)
+            
+            # Koşullu GET: veri değişmediyse 304 döner, gövde indirilmez/parse edilmez
+            hist_key = f"HIST_US_{ticker}_{days}"
+            previous = _cache.get(hist_key)
+            validators = previous.data if previous else {}
+            headers = {}
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+            
+            response = _session.get(url, headers=headers, timeout=30)
+            
+            if response.status_code == 304 and previous:
+                return pd.DataFrame({
+                    'Date': np.asarray(validators['timestamps'], dtype='datetime64[s]'),
+                    'Close': np.asarray(validators['closes'], dtype=np.float64)
+                })
             
             if response.status_code == 200:
                 data = response.json()
                 chart = data['chart']['result'][0]
-                timestamps = chart['timestamp']
-                closes = chart['indicators']['quote'][0]['close']
+                # None kapanışlar float64'e çevrilirken NaN olur
+                ts_raw = np.asarray(chart['timestamp'], dtype=np.int64)
+                close_arr = np.asarray(chart['indicators']['quote'][0]['close'], dtype=np.float64)
+                mask = ~np.isnan(close_arr)
                 
-                df = pd.DataFrame({
-                    'Date': pd.to_datetime(timestamps, unit='s'),
-                    'Close': closes
-                })
-                df = df.dropna()
-                return df
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                if etag or last_modified:
+                    _cache.set(hist_key, {
+                        'etag': etag,
+                        'last_modified': last_modified,
+                        'timestamps': ts_raw[mask].tolist(),
+                        'closes': close_arr[mask].tolist()
+                    })
+                
+                return pd.DataFrame({'Date': ts_raw[mask].astype('datetime64[s]'), 'Close': close_arr[mask]})
             
             return pd.DataFrame(columns=['Date', 'Close'])
         
-        df = hist[['Close']].reset_index()
-        df['Date'] = pd.to_datetime(df['Date']).dt.tz_localize(None)
-        return df
+        hist.index = hist.index.tz_localize(None)
+        return pd.DataFrame({'Date': hist.index.values, 'Close': hist['Close'].to_numpy()})
         
     except Exception as e:
         logger.error(f"Geçmiş veri hatası ({ticker}): {e}")
@@ -413,6 +735,33 @@ def fetch_us_stock_history(ticker: str, days: int = 30) -> pd.DataFrame:
 # KRİPTO - CCXT
 # =============================================================================
 
+# Borsa nesneleri paylaşılır: market metadata ve keep-alive bağlantıları
+# her sembolde yeniden kurulmaz
+_EXCHANGES: dict = {}
+_exchange_lock = threading.Lock()
+
+
+def _since_ms(days: int) -> int:
+    """ccxt `since` parametresi: `days` gün öncesinin epoch milisaniyesi."""
+    return int((time.time() - days * 86400) * 1000)
+
+
+def _get_exchange(exchange_id: str, timeout: int = 30):
+    """Paylaşılan ccxt borsa nesnesini döndür (ilk çağrıda oluşturulur)."""
+    exchange = _EXCHANGES.get(exchange_id)
+    if exchange is None:
+        with _exchange_lock:
+            exchange = _EXCHANGES.get(exchange_id)
+            if exchange is None:
+                exchange = getattr(ccxt, exchange_id)({
+                    'enableRateLimit': True,
+                    'timeout': timeout * 1000,
+                    'session': _session
+                })
+                _EXCHANGES[exchange_id] = exchange
+    return exchange
+
+
 def fetch_crypto_price(symbol: str, exchange_id: str = 'binance', timeout: int = 30) -> dict:
     """Kripto fiyatını çek."""
     cache_key = f"CRYPTO_{symbol.replace('/', '_')}"
@@ -428,19 +777,24 @@ def fetch_crypto_price(symbol: str, exchange_id: str = 'binance', timeout: int =
             'timestamp': datetime.now().isoformat()
         }
     
+    cached = _cache.get(cache_key, ttl_override=_CLASS_TTLS['CRYPTO'])
+    if cached and not cached.is_stale:
+        logger.info(f"{symbol} (cache): ${cached.data.get('current_price', 'N/A')}")
+        return cached.data
+    
+    failed = _recent_failure(cache_key)
+    if failed:
+        return cached.data if cached else failed
+    
     try:
         logger.info(f"Kripto çekiliyor: {symbol}")
         
-        exchange_class = getattr(ccxt, exchange_id)
-        exchange = exchange_class({
-            'enableRateLimit': True,
-            'timeout': timeout * 1000
-        })
+        exchange = _get_exchange(exchange_id, timeout)
         
         ticker_data = exchange.fetch_ticker(symbol)
         current_price = float(ticker_data['last'])
         
-        since = exchange.parse8601((datetime.now() - timedelta(days=8)).isoformat())
+        since = _since_ms(8)
         ohlcv = exchange.fetch_ohlcv(symbol, '1d', since=since, limit=8)
         
         if ohlcv and len(ohlcv) >= 2:
@@ -465,11 +819,7 @@ def fetch_crypto_price(symbol: str, exchange_id: str = 'binance', timeout: int =
     except Exception as e:
         logger.error(f"Kripto hatası ({symbol}): {e}")
         
-        cached = _cache.get(cache_key)
-        if cached and 'data' in cached:
-            return cached['data']
-        
-        return {
+        error_result = {
             'symbol': symbol,
             'name': symbol.split('/')[0],
             'current_price': None,
@@ -478,6 +828,81 @@ def fetch_crypto_price(symbol: str, exchange_id: str = 'binance', timeout: int =
             'error': str(e),
             'timestamp': datetime.now().isoformat()
         }
+        _cache.set(f"{cache_key}_err", error_result, ttl_override=_NEGATIVE_TTL)
+        
+        if cached:
+            return cached.data
+        
+        return error_result
+
+
+def fetch_crypto_prices_batch(symbols: list, exchange_id: str = 'binance', timeout: int = 30) -> dict:
+    """
+    Birden fazla kripto fiyatını tek fetch_tickers isteğiyle çek.
+    
+    Geçen haftanın kapanışları (OHLCV) thread havuzunda paralel çekilir.
+    Toplu çekimde gelmeyen semboller için fetch_crypto_price'a düşülür.
+    Sonuç girdi sırasıyla döner.
+    """
+    if not CCXT_AVAILABLE:
+        return {symbol: fetch_crypto_price(symbol, exchange_id, timeout) for symbol in symbols}
+    
+    results = {}
+    pending = []
+    for symbol in symbols:
+        cache_key = f"CRYPTO_{symbol.replace('/', '_')}"
+        cached = _cache.get(cache_key, ttl_override=_CLASS_TTLS['CRYPTO'])
+        if cached and not cached.is_stale:
+            results[symbol] = cached.data
+        elif _recent_failure(cache_key):
+            results[symbol] = fetch_crypto_price(symbol, exchange_id, timeout)
+        else:
+            pending.append(symbol)
+    
+    if pending:
+        exchange = _get_exchange(exchange_id, timeout)
+        
+        try:
+            logger.info(f"Kripto toplu çekim: {', '.join(pending)}")
+            tickers = exchange.fetch_tickers(pending)
+        except Exception as e:
+            logger.warning(f"Kripto toplu çekim hatası: {e}")
+            tickers = {}
+        
+        priced = [s for s in pending if (tickers.get(s) or {}).get('last') is not None]
+        since = _since_ms(8)
+        
+        def prev_week_close(symbol: str) -> Optional[float]:
+            try:
+                ohlcv = exchange.fetch_ohlcv(symbol, '1d', since=since, limit=8)
+                return float(ohlcv[0][4]) if ohlcv and len(ohlcv) >= 2 else None
+            except Exception as e:
+                logger.warning(f"Kripto OHLCV hatası ({symbol}): {e}")
+                return None
+        
+        prev_closes = dict(zip(priced, _get_executor('crypto').map(prev_week_close, priced)))
+        
+        for symbol in pending:
+            if symbol not in prev_closes:
+                results[symbol] = fetch_crypto_price(symbol, exchange_id, timeout)
+                continue
+            
+            current_price = float(tickers[symbol]['last'])
+            prev_week_price = prev_closes[symbol]
+            result = {
+                'symbol': symbol,
+                'name': symbol.split('/')[0],
+                'current_price': current_price,
+                'prev_week_price': prev_week_price if prev_week_price is not None else current_price,
+                'currency': 'USDT',
+                'source': exchange_id,
+                'timestamp': datetime.now().isoformat()
+            }
+            _cache.set(f"CRYPTO_{symbol.replace('/', '_')}", result)
+            logger.info(f"{symbol}: ${current_price:.4f}")
+            results[symbol] = result
+    
+    return {symbol: results[symbol] for symbol in symbols}
 
 
 def fetch_crypto_history(symbol: str, days: int = 30, exchange_id: str = 'binance') -> pd.DataFrame:
@@ -486,18 +911,20 @@ def fetch_crypto_history(symbol: str, days: int = 30, exchange_id: str = 'binanc
         return pd.DataFrame(columns=['Date', 'Close'])
     
     try:
-        exchange_class = getattr(ccxt, exchange_id)
-        exchange = exchange_class({'enableRateLimit': True})
+        exchange = _get_exchange(exchange_id)
         
-        since = exchange.parse8601((datetime.now() - timedelta(days=days + 1)).isoformat())
+        since = _since_ms(days + 1)
         ohlcv = exchange.fetch_ohlcv(symbol, '1d', since=since, limit=days + 1)
         
         if not ohlcv:
             return pd.DataFrame(columns=['Date', 'Close'])
         
-        df = pd.DataFrame(ohlcv, columns=['Timestamp', 'Open', 'High', 'Low', 'Close', 'Volume'])
-        df['Date'] = pd.to_datetime(df['Timestamp'], unit='ms')
-        return df[['Date', 'Close']]
+        # [timestamp, open, high, low, close, volume] satırları
+        arr = np.asarray(ohlcv, dtype=np.float64)
+        return pd.DataFrame({
+            'Date': arr[:, 0].astype(np.int64).astype('datetime64[ms]'),
+            'Close': arr[:, 4]
+        })
         
     except Exception as e:
         logger.error(f"Kripto geçmiş hatası ({symbol}): {e}")
@@ -508,6 +935,30 @@ def fetch_crypto_history(symbol: str, days: int = 30, exchange_id: str = 'binanc
 # TEFAS
 # =============================================================================
 
+# Crawler oluşturulurken oturum/cookie ısınması yapılır; fon başına
+# tekrarlanmasın diye her worker thread kendi örneğini saklar. Modül
+# seviyesindeki _session'dan farkı: crawler isteği kendi oturumunun cookie
+# durumunu günceller; thread'ler arası paylaşılınca bir fonun yanıtı
+# diğerinin cookie'lerini ezebilir. _session yalnızca durumsuz GET'ler için
+# paylaşılır
+_tefas_local = threading.local()
+
+
+def _get_tefas_crawler():
+    """Bu thread'in TEFAS crawler'ını döndür (thread'de ilk çağrıda oluşturulur)."""
+    crawler = getattr(_tefas_local, 'crawler', None)
+    if crawler is None:
+        crawler = TefasCrawler()
+        session = getattr(crawler, 'session', None)
+        if session is not None:
+            # Global adapter'ın havuzu diğer oturumlarla paylaşılmasın
+            crawler_adapter = HTTPAdapter(max_retries=retry_strategy)
+            session.mount("http://", crawler_adapter)
+            session.mount("https://", crawler_adapter)
+        _tefas_local.crawler = crawler
+    return crawler
+
+
 def fetch_tefas_price_crawler(fund_code: str, timeout: int = 30) -> Optional[dict]:
     """TEFAS fon fiyatını tefas-crawler ile çek."""
     if not TEFAS_CRAWLER_AVAILABLE:
@@ -516,7 +967,7 @@ def fetch_tefas_price_crawler(fund_code: str, timeout: int = 30) -> Optional[dic
     try:
         logger.info(f"TEFAS crawler: {fund_code}")
         
-        crawler = TefasCrawler()
+        crawler = _get_tefas_crawler()
         end_date = datetime.now()
         start_date = end_date - timedelta(days=14)
         
@@ -553,10 +1004,7 @@ def fetch_tefas_price_requests(fund_code: str, timeout: int = 30) -> Optional[di
     try:
         logger.info(f"TEFAS API: {fund_code}")
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'application/json'
-        }
+        headers = {'Accept': 'application/json'}
         
         end_date = datetime.now().strftime('%Y-%m-%d')
         start_date = (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d')
@@ -594,22 +1042,27 @@ def fetch_tefas_price(fund_code: str, timeout: int = 30) -> dict:
     """TEFAS fon fiyatını çek."""
     cache_key = f"TEFAS_{fund_code}"
     
+    # Önce cache kontrol et
+    cached = _cache.get(cache_key, ttl_override=_CLASS_TTLS['TEFAS'])
+    if cached and not cached.is_stale:
+        logger.info(f"{fund_code} (cache): {cached.data.get('current_price', 'N/A')} TL")
+        return cached.data
+    
+    failed = _recent_failure(cache_key)
+    if failed:
+        return cached.data if cached else failed
+    
     result = fetch_tefas_price_crawler(fund_code, timeout)
     if result and result.get('current_price'):
-        _cache.set(cache_key, result)
+        _cache.set(cache_key, result, ttl_override=_tefas_ttl())
         return result
     
     result = fetch_tefas_price_requests(fund_code, timeout)
     if result and result.get('current_price'):
-        _cache.set(cache_key, result)
+        _cache.set(cache_key, result, ttl_override=_tefas_ttl())
         return result
     
-    cached = _cache.get(cache_key)
-    if cached and 'data' in cached:
-        logger.warning(f"Cache'den TEFAS: {fund_code}")
-        return cached['data']
-    
-    return {
+    error_result = {
         'code': fund_code,
         'name': fund_code,
         'current_price': None,
@@ -618,6 +1071,13 @@ def fetch_tefas_price(fund_code: str, timeout: int = 30) -> dict:
         'error': 'Veri alınamadı',
         'timestamp': datetime.now().isoformat()
     }
+    _cache.set(f"{cache_key}_err", error_result, ttl_override=_NEGATIVE_TTL)
+    
+    if cached:
+        logger.warning(f"Cache'den TEFAS: {fund_code}")
+        return cached.data
+    
+    return error_result
 
 
 def fetch_tefas_history(fund_code: str, days: int = 30) -> pd.DataFrame:
@@ -626,7 +1086,7 @@ def fetch_tefas_history(fund_code: str, days: int = 30) -> pd.DataFrame:
         return pd.DataFrame(columns=['Date', 'Close'])
     
     try:
-        crawler = TefasCrawler()
+        crawler = _get_tefas_crawler()
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days + 5)
         
@@ -640,9 +1100,10 @@ def fetch_tefas_history(fund_code: str, days: int = 30) -> pd.DataFrame:
         if df is None or df.empty:
             return pd.DataFrame(columns=['Date', 'Close'])
         
-        df = df.rename(columns={'date': 'Date', 'price': 'Close'})
-        df['Date'] = pd.to_datetime(df['Date'])
-        return df[['Date', 'Close']]
+        return pd.DataFrame({
+            'Date': pd.to_datetime(df['date']).to_numpy(),
+            'Close': df['price'].to_numpy(dtype=np.float64)
+        })
         
     except Exception as e:
         logger.error(f"TEFAS geçmiş hatası ({fund_code}): {e}")
@@ -659,30 +1120,107 @@ def fetch_all_prices(
     crypto_symbols: list,
     timeout: int = 30
 ) -> dict:
-    """Tüm varlık fiyatlarını çek."""
+    """
+    Tüm varlık fiyatlarını çek.
+    
+    Sağlayıcılar (TEFAS, Binance, Yahoo) ayrı host'lar olduğu için paralel
+    çekilir: TEFAS ve Yahoo kendi thread havuzlarında, kripto ise toplu
+    çekim olarak çağıran thread'de. Yahoo havuzu küçük tutulur; istek
+    aralığı _rate_limit_yahoo ile korunur.
+    """
+    fetch_time = datetime.now().isoformat()
     
+    tefas_pool, yahoo_pool = _get_executor('tefas'), _get_executor('yahoo')
+    
+    usd_future = yahoo_pool.submit(fetch_usd_try_rate, timeout)
+    tefas_futures = {code: tefas_pool.submit(fetch_tefas_price, code, timeout) for code in tefas_codes}
+    us_future = yahoo_pool.submit(fetch_us_stocks_batch, us_tickers, timeout)
+    
+    crypto = fetch_crypto_prices_batch(crypto_symbols, timeout=timeout)
+    
+    # Sonuçlar girdi sırasıyla toplanır
     results = {
-        'usd_try': fetch_usd_try_rate(timeout),
-        'tefas': {},
-        'us_stocks': {},
-        'crypto': {},
-        'fetch_time': datetime.now().isoformat()
+        'usd_try': usd_future.result(),
+        'tefas': {code: f.result() for code, f in tefas_futures.items()},
+        'us_stocks': us_future.result(),
+        'crypto': crypto,
+        'fetch_time': fetch_time
     }
     
-    # TEFAS (rate limit yok)
-    for code in tefas_codes:
-        results['tefas'][code] = fetch_tefas_price(code, timeout)
-        time.sleep(0.3)
+    _cache.flush()
+    return results
+
+
+def _us_histories_batch(tickers: list, days: int = 30) -> dict:
+    """
+    ABD hisse geçmişlerini tek yf.download çağrısıyla çek.
+    
+    Toplu çekimde verisi gelmeyenler için fetch_us_stock_history'ye düşülür.
+    """
+    if not tickers:
+        return {}
+    
+    _rate_limit_yahoo()
+    
+    try:
+        logger.info(f"yfinance toplu geçmiş: {', '.join(tickers)}")
+        hist = yf.download(list(tickers), period=f"{days}d", group_by='ticker',
+                           progress=False, threads=True)
+    except Exception as e:
+        logger.warning(f"yfinance toplu geçmiş hatası: {e}")
+        hist = pd.DataFrame()
     
-    # Kripto (Binance rate limit düşük)
-    for symbol in crypto_symbols:
-        results['crypto'][symbol] = fetch_crypto_price(symbol, timeout=timeout)
-        time.sleep(0.3)
+    multi = isinstance(hist.columns, pd.MultiIndex)
+    tickers_in_hist = set(hist.columns.get_level_values(0)) if multi else set()
     
-    # ABD hisseleri EN SONA (Yahoo rate limit)
-    for ticker in us_tickers:
-        results['us_stocks'][ticker] = fetch_us_stock_price(ticker, timeout)
+    results = {}
+    for ticker in tickers:
+        if multi:
+            closes = hist[ticker]['Close'].dropna() if ticker in tickers_in_hist else None
+        else:
+            closes = hist['Close'].dropna() if 'Close' in hist.columns else None
+        
+        if closes is None or closes.empty:
+            results[ticker] = fetch_us_stock_history(ticker, days)
+            continue
+        
+        index = closes.index
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        results[ticker] = pd.DataFrame({'Date': index.values, 'Close': closes.to_numpy(dtype=np.float64)})
+    
+    return results
+
+
+def fetch_histories_batch(
+    tefas_codes: list,
+    us_tickers: list,
+    crypto_symbols: list,
+    days: int = 30
+) -> dict:
+    """
+    Birden fazla varlığın geçmiş verisini tek seferde çek.
+    
+    fetch_all_prices ile aynı düzen: ABD hisseleri tek yf.download isteğiyle
+    çağıran thread'de, TEFAS ve kripto (sembol başına OHLCV) kendi thread
+    havuzlarında. Her sınıf için {kod: DataFrame['Date', 'Close']} döner.
+    """
+    tefas_pool, crypto_pool = _get_executor('tefas'), _get_executor('crypto')
+    
+    tefas_futures = {code: tefas_pool.submit(fetch_tefas_history, code, days) for code in tefas_codes}
+    crypto_futures = {
+        symbol: crypto_pool.submit(fetch_crypto_history, symbol, days) for symbol in crypto_symbols
+    }
+    
+    us_stocks = _us_histories_batch(us_tickers, days)
+    
+    results = {
+        'tefas': {code: f.result() for code, f in tefas_futures.items()},
+        'us_stocks': us_stocks,
+        'crypto': {symbol: f.result() for symbol, f in crypto_futures.items()},
+    }
     
+    _cache.flush()
     return results
 
 
@@ -9,8 +9,10 @@ Tarih: Ocak 2026
 """
 
 import logging
+import time
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache, reduce
 from pathlib import Path
 from typing import Any, Optional
 
@@ -18,24 +20,96 @@ import numpy as np
 import pandas as pd
 import yaml
 
+# libyaml varsa C yükleyici (safe_load ile aynı kurallar, birkaç kat hızlı)
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# Numba import (opsiyonel - yoksa çekirdekler saf NumPy olarak çalışır)
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 from data_fetcher import (
+    _NEGATIVE_TTL,
     fetch_all_prices,
     fetch_crypto_history,
+    fetch_histories_batch,
     fetch_tefas_history,
     fetch_us_stock_history,
     fetch_usd_try_rate,
     get_cache,
+    history_ttl,
     set_cache_ttl,
 )
 
 logger = logging.getLogger(__name__)
 
+# Asset alanlarının SoA kolon karşılıkları (_materialize_assets sırası)
+_SOA_ASSET_FIELDS = (
+    'code', 'name', 'asset_type', 'shares', 'price', 'prev_price', 'currency',
+    'target_weight', 'is_cash', 'value_original', 'value_try', 'actual_weight',
+    'weekly_return', 'weight_deviation', 'valid',
+)
+# Fiyat yenilemesinde değişen alanlar (_sync_assets sırası)
+_SOA_PRICE_FIELDS = (
+    'name', 'price', 'prev_price', 'value_original', 'value_try', 'actual_weight',
+    'weekly_return', 'weight_deviation', 'valid',
+)
+
+# Eksik fiyat bilgisi için paylaşılan boş varsayılan (yalnızca okunur)
+_EMPTY: dict = {}
+
+# Bu uzunluğun üzerindeki getiri serilerinde tek geçişli (Welford) istatistik
+_WELFORD_MIN_LEN = 10_000
+
+# Özet tablosunda isimlerin kısaltılacağı uzunluk
+_DISPLAY_NAME_LEN = 25
+
+# SoA kolonu -> özet tablo başlığı (get_summary_dataframe sırası)
+_SUMMARY_COL_MAP = {
+    'code': 'Kod',
+    'asset_type': 'Tür',
+    'display_name': 'İsim',
+    'shares': 'Adet',
+    'price': 'Fiyat',
+    'currency': 'Birim',
+    'value_try': 'Değer (TRY)',
+    'actual_weight': 'Ağırlık (%)',
+    'target_weight': 'Hedef (%)',
+    'weight_deviation': 'Sapma (%)',
+    'weekly_return': 'Haftalık (%)',
+    'is_cash': 'Nakit',
+}
+
+# Varlık tipi -> geçmiş veri çekici (kod, gün); CASH ayrıca ele alınır
+_HIST_FETCHERS = {
+    "TEFAS": fetch_tefas_history,
+    "US_STOCK": fetch_us_stock_history,
+    "CRYPTO": lambda code, days: fetch_crypto_history(f"{code}/USDT", days),
+}
+
+# Varlık tipi -> fetch_histories_batch sonucundaki (grup, sembol şablonu)
+_HIST_BATCH_KEYS = {
+    "TEFAS": ("tefas", "{code}"),
+    "US_STOCK": ("us_stocks", "{code}"),
+    "CRYPTO": ("crypto", "{code}/USDT"),
+}
+
 
 # =============================================================================
 # VERİ SINIFLARI
 # =============================================================================
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class Asset:
     """Tek bir varlığı temsil eden sınıf."""
     code: str
@@ -53,15 +127,18 @@ class Asset:
     actual_weight: float = 0.0
     weekly_return: float = 0.0
     weight_deviation: float = 0.0
-    
-    @property
-    def is_valid(self) -> bool:
-        return self.current_price is not None and self.current_price > 0 and self.shares > 0
+    # Fiyat > 0 ve adet > 0; değer çekirdeğinde hesaplanıp her yenilemede yazılır
+    is_valid: bool = False
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PortfolioConfig:
-    """Portföy konfigürasyonu."""
+    """
+    Portföy konfigürasyonu.
+    
+    Alanlar değiştirilemez; varlık listelerinin içeriği (dashboard'daki
+    ekleme/silme) yerinde güncellenebilir.
+    """
     risk_free_rate: float = 0.35
     cache_ttl_seconds: int = 3600
     fetch_timeout_seconds: int = 30
@@ -154,25 +231,123 @@ def dict_to_config(data: dict) -> PortfolioConfig:
 # KONFİGÜRASYON YÖNETİMİ (Dosya)
 # =============================================================================
 
+# Dosya yolu -> (mtime_ns, config); dosya değişmedikçe YAML tekrar parse edilmez
+_CONFIG_CACHE: dict[str, tuple[int, PortfolioConfig]] = {}
+
+
 def load_config(config_path: str = "config.yaml") -> PortfolioConfig:
-    """YAML config dosyasını yükle."""
+    """
+    YAML config dosyasını yükle.
+    
+    Sonuç dosyanın mtime'ına göre önbelleklenir; PortfolioConfig frozen
+    olduğu için aynı örnek paylaşılır.
+    """
     config_file = Path(config_path)
     
-    if not config_file.exists():
+    try:
+        mtime = config_file.stat().st_mtime_ns
+    except FileNotFoundError:
         logger.warning(f"Config bulunamadı: {config_path}")
         return PortfolioConfig()
     
+    key = str(config_file.resolve())
+    cached = _CONFIG_CACHE.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
     try:
         with open(config_file, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=_YamlLoader)
         
-        return dict_to_config(data)
+        config = dict_to_config(data)
+        _CONFIG_CACHE[key] = (mtime, config)
+        return config
         
     except Exception as e:
         logger.error(f"Config yükleme hatası: {e}")
         return PortfolioConfig()
 
 
+# =============================================================================
+# HESAPLAMA ÇEKİRDEKLERİ
+# =============================================================================
+
+# Açık imzalar: çekirdekler import anında derlenir ve cache=True ile diskteki
+# derleme yeniden kullanılır; ilk refresh_prices JIT gecikmesi ödemez
+_COMPUTE_VALUES_SIG = "Tuple((b1[:], f8[:], f8[:], f8[:], f8[:], f8[:]))(f8[:], f8[:], f8[:], f8[:], f8[:])"
+
+
+@njit(_COMPUTE_VALUES_SIG, cache=True, fastmath=True)
+def _compute_values(shares, price, prev_price, fx_mult, target_weight):
+    """Değer, ağırlık, sapma ve haftalık getiri kolonları (geçersizler 0)."""
+    valid = (price > 0) & (shares > 0)
+    value_original = np.where(valid, shares * price, 0.0)
+    value_try = value_original * fx_mult
+    total_try = value_try.sum()
+    
+    # Tek bölme: toplamın tersi bir kez alınır, ağırlıklar çarpımla bulunur
+    inv_total = 100.0 / total_try if total_try > 0 else 0.0
+    actual_weight = value_try * inv_total
+    weight_deviation = np.where(valid, actual_weight - target_weight, 0.0)
+    
+    has_prev = valid & (prev_price > 0)
+    safe_prev = np.where(has_prev, prev_price, 1.0)
+    weekly_return = np.where(has_prev, (price - prev_price) / safe_prev, 0.0) * 100
+    
+    return valid, value_original, value_try, actual_weight, weight_deviation, weekly_return
+
+
+def _daily_returns(prices: np.ndarray) -> np.ndarray:
+    """
+    Kapanış matrisinden (gün x varlık) günlük getiriler. Gösterim 2 ondalıklı
+    yüzde olduğundan float32 yeterlidir; matris trafiği yarıya iner.
+    """
+    return (prices[1:] / prices[:-1] - 1.0).astype(np.float32)
+
+
+@njit("UniTuple(f8, 2)(f8[:])", cache=True)
+def _mean_std(x):
+    """Tek geçişte (Welford) ortalama ve örneklem standart sapması (ddof=1)."""
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    for v in x:
+        n += 1
+        delta = v - mean
+        mean += delta / n
+        m2 += delta * (v - mean)
+    return mean, np.sqrt(m2 / (n - 1))
+
+
+@njit("UniTuple(f8, 2)(f8[:], f8)", cache=True)
+def _risk_stats(portfolio_returns, daily_rf):
+    """
+    Portföyün günlük getiri serisinden günlük volatilite (ddof=1) ve yıllık
+    Sharpe oranı. Volatilite 0 ise Sharpe NaN.
+    """
+    n = portfolio_returns.shape[0]
+    if NUMBA_AVAILABLE and n > _WELFORD_MIN_LEN:
+        # Uzun seride tek geçiş bellek trafiğini yarıya indirir; numba yoksa
+        # Python döngüsü olacağı için iki geçişli NumPy yolu kullanılır
+        mean, daily_vol = _mean_std(portfolio_returns)
+    else:
+        mean = portfolio_returns.mean()
+        daily_vol = np.sqrt(((portfolio_returns - mean) ** 2).sum() / (n - 1))
+    
+    if daily_vol > 0:
+        sharpe = ((mean - daily_rf) / daily_vol) * np.sqrt(252.0)
+    else:
+        sharpe = np.nan
+    return daily_vol, sharpe
+
+
+@lru_cache(maxsize=8)
+def _cash_history(today: date, days: int) -> pd.DataFrame:
+    """Nakit için sabit 1.0 kapanışlı geçmiş; gün başına bir kez üretilir."""
+    dates = pd.date_range(end=pd.Timestamp(today), periods=days, freq='D')
+    return pd.DataFrame({'Date': dates, 'Close': np.ones(days)})
+
+
 # =============================================================================
 # PORTFÖY SINIFI
 # =============================================================================
@@ -183,10 +358,27 @@ class Portfolio:
     def __init__(self, config: PortfolioConfig):
         self.config = config
         self.assets: list[Asset] = []
+        self._assets_by_code: dict[str, Asset] = {}
         self.metrics = PortfolioMetrics()
         self.usd_try_rate: float = 35.0
         self.last_update: Optional[datetime] = None
         self.price_data: dict[str, Any] = {}
+        # (kod, gün) -> (geçerlilik sonu, (günler, kapanışlar)); risk ve
+        # korelasyon aynı veriyi kullanır. Son günlük bar gün içinde
+        # değişebildiğinden her kayıt varlık sınıfının history_ttl'i kadar
+        # (monotonic) geçerlidir; force tümünü sıfırlar
+        self._closes_cache: dict[tuple[str, int], tuple[float, Optional[tuple[np.ndarray, np.ndarray]]]] = {}
+        # Son matristeki en erken geçerlilik sonu; risk sonucu bu ana kadar geçerli
+        self._closes_valid_until: float = 0.0
+        # Son risk hesabının girdileri ve sonucu (volatilite, sharpe)
+        self._risk_key: Optional[tuple] = None
+        self._risk_snapshot: tuple[Optional[float], Optional[float]] = (None, None)
+        self._soa: dict[str, np.ndarray] = {}
+        # _soa'nın kurulduğu config düzeni (_config_layout); farklıysa yeniden kurulur
+        self._layout: Optional[tuple] = None
+        self._price_slots: dict[str, tuple[np.ndarray, list[str]]] = {}
+        # get_history_data için (tür, kod, gün) -> (geçerlilik sonu [monotonic], DataFrame)
+        self._history_memo: dict[tuple[str, str, int], tuple[float, pd.DataFrame]] = {}
         
         set_cache_ttl(config.cache_ttl_seconds)
     
@@ -208,7 +400,11 @@ class Portfolio:
             
             self.usd_try_rate = self.price_data.get('usd_try', 35.0)
             
-            self._build_assets()
+            # Varlık sayfası config listelerini yerinde düzenler; düzen
+            # değiştiyse yapı yeniden kurulur
+            if self._layout != self._config_layout():
+                self._build_assets_structure()
+            self._update_prices()
             self._calculate_metrics()
             
             self.last_update = datetime.now()
@@ -220,134 +416,236 @@ class Portfolio:
             logger.error(f"Güncelleme hatası: {e}")
             return False
     
+    def update_config(self, config: PortfolioConfig) -> None:
+        """Fiyatları tekrar çekmeden yeni konfigürasyonu uygula.
+        
+        Adet/hedef değişiklikleri mevcut price_data ile yeniden hesaplanır;
+        yalnızca price_data'da olmayan yeni varlıkların fiyatı çekilir.
+        Risk metrikleri bir sonraki refresh_prices'a kadar korunur.
+        """
+        self.config = config
+        set_cache_ttl(config.cache_ttl_seconds)
+        
+        if not self.price_data:
+            # Yapı ilk refresh_prices'ta yeni düzene göre kurulur
+            return
+        
+        self._fetch_missing_prices()
+        self._build_assets()
+        self._calculate_metrics(include_risk=False)
+    
+    def _fetch_missing_prices(self) -> None:
+        """Config'e eklenmiş, price_data'da karşılığı olmayan varlıkların fiyatlarını çek."""
+        wanted = {
+            'tefas': [f['code'] for f in self.config.tefas_funds],
+            'us_stocks': [s['ticker'] for s in self.config.us_stocks],
+            'crypto': [c['symbol'] for c in self.config.crypto],
+        }
+        missing = {
+            group: [key for key in keys if key not in (self.price_data.get(group) or _EMPTY)]
+            for group, keys in wanted.items()
+        }
+        if not any(missing.values()):
+            return
+        
+        try:
+            fetched = fetch_all_prices(
+                tefas_codes=missing['tefas'],
+                us_tickers=missing['us_stocks'],
+                crypto_symbols=missing['crypto'],
+                timeout=self.config.fetch_timeout_seconds
+            )
+        except Exception as e:
+            logger.error(f"Yeni varlık fiyat hatası: {e}")
+            return
+        
+        for group in missing:
+            self.price_data[group] = {**(self.price_data.get(group) or _EMPTY), **(fetched.get(group) or _EMPTY)}
+    
     def _build_assets(self) -> None:
-        """Asset nesnelerini oluştur."""
-        self.assets = []
+        """Varlık tablosunu sıfırdan kur ve güncel fiyatları yaz."""
+        self._build_assets_structure()
+        self._update_prices()
+    
+    def _config_layout(self) -> tuple:
+        """SoA yapısını belirleyen config alanları (kod, adet, hedef, nakit kodları)."""
+        cfg = self.config
+        return (
+            tuple((f['code'], f['shares'], f.get('target_weight', 0)) for f in cfg.tefas_funds),
+            tuple((s['ticker'], s['shares'], s.get('target_weight', 0)) for s in cfg.us_stocks),
+            tuple((c['symbol'], c['amount'], c.get('target_weight', 0)) for c in cfg.crypto),
+            tuple((c['code'], c['amount'], c.get('target_weight', 0)) for c in cfg.cash),
+            tuple(cfg.cash_reserve_codes),
+        )
+    
+    def _build_assets_structure(self) -> None:
+        """
+        Config'e bağlı SoA kolonlarını (kod, tür, adet, hedef, döviz, nakit)
+        ve fiyat kolonlarını kur. Yalnızca config düzeni değişince çağrılır;
+        fiyat yenilemeleri _update_prices ile bu dizilere yerinde yazılır.
+        """
+        rows = []
+        cash_codes = frozenset(self.config.cash_reserve_codes)
+        # price_data grubu -> (satır indeksleri, fiyat anahtarları)
+        slots: dict[str, tuple[list[int], list[str]]] = {
+            'tefas': ([], []), 'us_stocks': ([], []), 'crypto': ([], [])
+        }
+        
+        def add(group: str, key: str, row: tuple) -> None:
+            slots[group][0].append(len(rows))
+            slots[group][1].append(key)
+            rows.append(row)
         
         # TEFAS
         for fund in self.config.tefas_funds:
             code = fund['code']
-            price_info = self.price_data.get('tefas', {}).get(code, {})
-            is_cash = code in self.config.cash_reserve_codes
-            
-            asset = Asset(
-                code=code,
-                name=price_info.get('name', code),
-                asset_type="TEFAS",
-                shares=fund['shares'],
-                current_price=price_info.get('current_price', 0) or 0,
-                prev_week_price=price_info.get('prev_week_price', 0) or 0,
-                currency='TRY',
-                target_weight=fund.get('target_weight', 0),
-                is_cash_reserve=is_cash
-            )
-            self.assets.append(asset)
+            add('tefas', code, (
+                code, code, "TEFAS", fund['shares'], 0.0, 0.0,
+                'TRY', fund.get('target_weight', 0), code in cash_codes
+            ))
         
         # US Stocks
         for stock in self.config.us_stocks:
             ticker = stock['ticker']
-            price_info = self.price_data.get('us_stocks', {}).get(ticker, {})
-            
-            asset = Asset(
-                code=ticker,
-                name=price_info.get('name', ticker),
-                asset_type="US_STOCK",
-                shares=stock['shares'],
-                current_price=price_info.get('current_price', 0) or 0,
-                prev_week_price=price_info.get('prev_week_price', 0) or 0,
-                currency='USD',
-                target_weight=stock.get('target_weight', 0),
-                is_cash_reserve=False
-            )
-            self.assets.append(asset)
+            add('us_stocks', ticker, (
+                ticker, ticker, "US_STOCK", stock['shares'], 0.0, 0.0,
+                'USD', stock.get('target_weight', 0), False
+            ))
         
         # Crypto
         for crypto in self.config.crypto:
             symbol = crypto['symbol']
-            price_info = self.price_data.get('crypto', {}).get(symbol, {})
             code = symbol.split('/')[0]
-            
-            asset = Asset(
-                code=code,
-                name=price_info.get('name', code),
-                asset_type="CRYPTO",
-                shares=crypto['amount'],
-                current_price=price_info.get('current_price', 0) or 0,
-                prev_week_price=price_info.get('prev_week_price', 0) or 0,
-                currency='USDT',
-                target_weight=crypto.get('target_weight', 0),
-                is_cash_reserve=False
-            )
-            self.assets.append(asset)
+            add('crypto', symbol, (
+                code, code, "CRYPTO", crypto['amount'], 0.0, 0.0,
+                'USDT', crypto.get('target_weight', 0), False
+            ))
         
-        # Cash
+        # Cash: fiyat sabit, price_data'dan beslenmez
         for cash_item in self.config.cash:
-            code = cash_item['code']
-            
-            asset = Asset(
-                code=code,
-                name="USD Nakit",
-                asset_type="CASH",
-                shares=cash_item['amount'],
-                current_price=1.0,
-                prev_week_price=1.0,
-                currency='USD',
-                target_weight=cash_item.get('target_weight', 0),
-                is_cash_reserve=True
-            )
-            self.assets.append(asset)
+            rows.append((
+                cash_item['code'], "USD Nakit", "CASH", cash_item['amount'],
+                1.0, 1.0, 'USD', cash_item.get('target_weight', 0), True
+            ))
         
-        self._calculate_values()
+        columns = list(zip(*rows)) if rows else [()] * 9
+        code, name, asset_type, shares, price, prev_price, currency, target_weight, is_cash = columns
+        
+        # Kaynak veri: kolon başına bir dizi; Asset nesneleri bundan üretilir
+        self._soa = {
+            'code': np.array(code, dtype=object),
+            'name': np.array(name, dtype=object),
+            'asset_type': np.array(asset_type, dtype=object),
+            'currency': np.array(currency, dtype=object),
+            'shares': np.array(shares, dtype=np.float64),
+            'price': np.array(price, dtype=np.float64),
+            'prev_price': np.array(prev_price, dtype=np.float64),
+            'target_weight': np.array(target_weight, dtype=np.float64),
+            'is_cash': np.array(is_cash, dtype=bool),
+        }
+        # Döviz bayrağı kur değişse de sabittir; bir kez hesaplanır
+        self._soa['is_fx'] = np.isin(self._soa['currency'], ('USD', 'USDT'))
+        self._price_slots = {
+            group: (np.array(idx, dtype=np.intp), keys) for group, (idx, keys) in slots.items()
+        }
+        self._layout = self._config_layout()
+        # Yapı değişti; Asset listesi bir sonraki _update_prices'ta yeniden üretilir
+        self.assets = []
+        self._assets_by_code = {}
     
-    def _calculate_values(self) -> None:
-        """Değer ve ağırlık hesapla."""
-        total_try = 0.0
+    def _update_prices(self) -> None:
+        """
+        price_data'daki fiyat ve isimleri mevcut SoA dizilerine yerinde yaz,
+        değerleri yeniden hesapla ve Asset nesnelerini güncelle.
+        """
+        soa = self._soa
+        price, prev_price, name = soa['price'], soa['prev_price'], soa['name']
         
-        for asset in self.assets:
-            if not asset.is_valid:
-                continue
-            
-            asset.value_original = asset.shares * asset.current_price
-            
-            if asset.currency in ('USD', 'USDT'):
-                asset.value_try = asset.value_original * self.usd_try_rate
-            else:
-                asset.value_try = asset.value_original
-            
-            total_try += asset.value_try
+        for group, (idx, keys) in self._price_slots.items():
+            prices = self.price_data.get(group) or _EMPTY
+            for i, key in zip(idx.tolist(), keys):
+                price_info = prices.get(key, _EMPTY)
+                price[i] = price_info.get('current_price', 0) or 0
+                prev_price[i] = price_info.get('prev_week_price', 0) or 0
+                name[i] = price_info.get('name', soa['code'][i])
         
-        for asset in self.assets:
-            if not asset.is_valid:
-                continue
-            
-            if total_try > 0:
-                asset.actual_weight = (asset.value_try / total_try) * 100
-            
-            asset.weight_deviation = asset.actual_weight - asset.target_weight
-            
-            if asset.prev_week_price and asset.prev_week_price > 0:
-                asset.weekly_return = ((asset.current_price - asset.prev_week_price) / asset.prev_week_price) * 100
-    
-    def _calculate_metrics(self) -> None:
-        """Portföy metriklerini hesapla."""
-        valid_assets = [a for a in self.assets if a.is_valid]
+        # Özet tablosundaki kısaltılmış isim; her render'da yeniden üretilmez
+        names = pd.Series(name, dtype=object)
+        soa['display_name'] = names.where(
+            names.str.len() <= _DISPLAY_NAME_LEN, names.str.slice(0, _DISPLAY_NAME_LEN) + '...'
+        ).to_numpy(dtype=object)
         
-        if not valid_assets:
+        self._calculate_values()
+        self._sync_assets()
+    
+    def _calculate_values(self) -> None:
+        """Değer ve ağırlık kolonlarını hesapla (geçersiz varlıklar 0 kalır)."""
+        soa = self._soa
+        # TRY çarpanı: döviz cinsi varlıklarda kur, diğerlerinde 1
+        soa['fx_mult'] = np.where(soa['is_fx'], float(self.usd_try_rate), 1.0)
+        (soa['valid'], soa['value_original'], soa['value_try'], soa['actual_weight'],
+         soa['weight_deviation'], soa['weekly_return']) = _compute_values(
+            soa['shares'], soa['price'], soa['prev_price'], soa['fx_mult'], soa['target_weight']
+        )
+    
+    def _sync_assets(self) -> None:
+        """
+        Asset nesnelerini SoA ile eşitle: yapı aynıysa yalnızca fiyata bağlı
+        alanlar yerinde güncellenir, aksi halde liste yeniden üretilir.
+        """
+        soa = self._soa
+        if len(self.assets) != len(soa['code']):
+            self._materialize_assets()
             return
         
-        self.metrics.total_value_try = sum(a.value_try for a in valid_assets)
-        
-        cash_assets = [a for a in valid_assets if a.is_cash_reserve]
-        self.metrics.cash_reserve_try = sum(a.value_try for a in cash_assets)
+        for asset, (name, price, prev_price, value_original, value_try, actual_weight,
+                    weekly_return, weight_deviation, valid) in zip(
+                self.assets, zip(*(soa[k].tolist() for k in _SOA_PRICE_FIELDS))):
+            asset.name = name
+            asset.current_price = price
+            asset.prev_week_price = prev_price
+            asset.value_original = value_original
+            asset.value_try = value_try
+            asset.actual_weight = actual_weight
+            asset.weekly_return = weekly_return
+            asset.weight_deviation = weight_deviation
+            asset.is_valid = valid
+    
+    def _materialize_assets(self) -> None:
+        """SoA tablosundan Asset listesini üret (dashboard/rapor arayüzü)."""
+        soa = self._soa
+        self.assets = [
+            Asset(
+                code=code, name=name, asset_type=asset_type, shares=shares,
+                current_price=price, prev_week_price=prev_price, currency=currency,
+                target_weight=target_weight, is_cash_reserve=is_cash,
+                value_original=value_original, value_try=value_try, actual_weight=actual_weight,
+                weekly_return=weekly_return, weight_deviation=weight_deviation, is_valid=valid
+            )
+            for (code, name, asset_type, shares, price, prev_price, currency, target_weight, is_cash,
+                 value_original, value_try, actual_weight, weekly_return, weight_deviation, valid)
+            in zip(*(soa[k].tolist() for k in _SOA_ASSET_FIELDS))
+        ]
+        self._assets_by_code = {a.code: a for a in self.assets}
+    
+    def _calculate_metrics(self, include_risk: bool = True, force: bool = False) -> None:
+        """Portföy metriklerini hesapla (force: risk önbelleğini yok say)."""
+        soa = self._soa
+        if not soa or not soa['valid'].any():
+            return
         
-        if self.metrics.total_value_try > 0:
-            self.metrics.cash_reserve_pct = (self.metrics.cash_reserve_try / self.metrics.total_value_try) * 100
+        # Geçersiz varlıkların value_try'ı zaten 0; maske toplamları etkilemez
+        value_try = soa['value_try']
+        total = float(value_try.sum())
+        self.metrics.total_value_try = total
+        self.metrics.cash_reserve_try = float(value_try[soa['is_cash'] & soa['valid']].sum())
         
-        # Ağırlıklı haftalık getiri
-        weighted_return = 0.0
-        for asset in valid_assets:
-            weight = asset.value_try / self.metrics.total_value_try if self.metrics.total_value_try > 0 else 0
-            weighted_return += asset.weekly_return * weight
+        if total > 0:
+            self.metrics.cash_reserve_pct = (self.metrics.cash_reserve_try / total) * 100
+            # Ağırlıklı haftalık getiri
+            weighted_return = float(soa['weekly_return'] @ value_try) / total
+        else:
+            weighted_return = 0.0
         
         self.metrics.weekly_return_pct = weighted_return
         self.metrics.warnings = []
@@ -355,147 +653,188 @@ class Portfolio:
         if self.metrics.weekly_return_pct < self.config.weekly_loss_threshold:
             self.metrics.warnings.append(f"⚠️ Yüksek kayıp: {self.metrics.weekly_return_pct:.1f}%")
         
-        self._calculate_risk_metrics()
+        if include_risk:
+            self._calculate_risk_metrics(force=force)
     
-    def _calculate_risk_metrics(self) -> None:
-        """Risk metriklerini hesapla."""
+    @staticmethod
+    def _to_closes(hist: Optional[pd.DataFrame]) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """Geçmiş veriyi gün çözünürlüğünde sıralı (günler, kapanışlar) dizilerine çevir."""
         try:
-            all_returns = []
+            if hist is None or len(hist) <= 5:
+                return None
+            dates = np.asarray(hist['Date'].to_numpy(), dtype='datetime64[D]')
+            closes = hist['Close'].to_numpy(dtype=np.float64)
+            mask = ~np.isnan(closes)
+            dates, closes = dates[mask], closes[mask]
+            # Aynı güne düşen kayıtlarda sonuncusu; np.unique sıralı döner
+            unique_dates, last_idx = np.unique(dates[::-1], return_index=True)
+            return unique_dates, closes[::-1][last_idx]
+        except Exception:
+            return None
+    
+    def _price_matrix(self, days: int = 30, force: bool = False) -> tuple[list[str], np.ndarray, np.ndarray]:
+        """
+        Nakit dışı geçerli varlıkların ortak günlerdeki kapanış matrisi.
+        
+        Dönüş: (kodlar, ağırlıklar, fiyatlar [gün x varlık]). Kapanışlar
+        _closes_cache'ten gelir; eksikler fetch_histories_batch ile tek
+        seferde çekilir. Kolonlar varlık sırasını korur.
+        """
+        if force:
+            self._closes_cache = {}
+        
+        now = time.monotonic()
+        targets = [a for a in self.assets if a.is_valid and a.asset_type != "CASH"]
+        missing = [
+            a for a in targets
+            if self._closes_cache.get((a.code, days), (0.0, None))[0] <= now
+        ]
+        
+        if missing:
+            try:
+                hists = fetch_histories_batch(
+                    tefas_codes=[a.code for a in missing if a.asset_type == "TEFAS"],
+                    us_tickers=[a.code for a in missing if a.asset_type == "US_STOCK"],
+                    crypto_symbols=[f"{a.code}/USDT" for a in missing if a.asset_type == "CRYPTO"],
+                    days=days
+                )
+            except Exception as e:
+                # Hata önbelleğe yazılmaz; bir sonraki çağrı yeniden dener
+                logger.warning(f"Toplu geçmiş veri hatası: {e}")
+                hists = None
             
-            for asset in self.assets:
-                if not asset.is_valid or asset.asset_type == "CASH":
-                    continue
-                
-                try:
-                    if asset.asset_type == "TEFAS":
-                        hist = fetch_tefas_history(asset.code, days=30)
-                    elif asset.asset_type == "US_STOCK":
-                        hist = fetch_us_stock_history(asset.code, days=30)
-                    elif asset.asset_type == "CRYPTO":
-                        symbol = f"{asset.code}/USDT"
-                        hist = fetch_crypto_history(symbol, days=30)
-                    else:
-                        continue
-                    
-                    if hist is not None and len(hist) > 5:
-                        returns = hist['Close'].pct_change().dropna()
-                        all_returns.append({
-                            'code': asset.code,
-                            'returns': returns,
-                            'weight': asset.actual_weight / 100
-                        })
-                except:
-                    continue
+            if hists is not None:
+                for asset in missing:
+                    group, symbol = _HIST_BATCH_KEYS[asset.asset_type]
+                    closes = self._to_closes(hists.get(group, {}).get(symbol.format(code=asset.code)))
+                    # Boş/başarısız geçmiş kısa süreli (negatif TTL) tutulur
+                    ttl = history_ttl(asset.asset_type) if closes is not None else _NEGATIVE_TTL
+                    self._closes_cache[(asset.code, days)] = (now + ttl, closes)
+        
+        codes, weights, series_list = [], [], []
+        valid_until = float('inf')
+        for asset in targets:
+            expires, series = self._closes_cache.get((asset.code, days), (0.0, None))
+            valid_until = min(valid_until, expires)
+            if series is not None:
+                codes.append(asset.code)
+                weights.append(asset.actual_weight / 100)
+                series_list.append(series)
+        
+        self._closes_valid_until = valid_until
+        
+        if not series_list:
+            return codes, np.empty(0), np.empty((0, 0))
+        
+        common = reduce(np.intersect1d, (dates for dates, _ in series_list))
+        prices = np.column_stack([
+            closes[np.searchsorted(dates, common)] for dates, closes in series_list
+        ])
+        return codes, np.array(weights, dtype=np.float32), prices
+    
+    def _calculate_risk_metrics(self, days: int = 30, force: bool = False) -> None:
+        """
+        Risk metriklerini hesapla.
+        
+        Varlıklar, ağırlıklar, pencere ve risksiz oran aynıysa ve kullanılan
+        kapanışların hiçbirinin TTL'i dolmadıysa son sonuç geri yüklenir.
+        """
+        risk_key = (
+            tuple((a.code, a.actual_weight) for a in self.assets if a.is_valid and a.asset_type != "CASH"),
+            days, self.config.risk_free_rate
+        )
+        if not force and risk_key == self._risk_key and time.monotonic() < self._closes_valid_until:
+            self.metrics.volatility_monthly, self.metrics.sharpe_ratio = self._risk_snapshot
+            return
+        
+        try:
+            codes, weights, prices = self._price_matrix(days=days, force=force)
             
-            if len(all_returns) >= 2:
-                portfolio_returns = pd.Series(dtype=float)
-                
-                for item in all_returns:
-                    if len(portfolio_returns) == 0:
-                        portfolio_returns = item['returns'] * item['weight']
-                    else:
-                        aligned = portfolio_returns.align(item['returns'] * item['weight'], join='inner')
-                        portfolio_returns = aligned[0] + aligned[1]
+            if len(codes) >= 2:
+                # Ortak günlerde tüm varlıkların günlük getirileri tek dilimde
+                returns = _daily_returns(prices)
                 
-                if len(portfolio_returns) > 5:
-                    daily_vol = portfolio_returns.std()
+                if len(returns) > 5:
+                    # Ağırlıklı toplam tek BLAS gemv; numba'da np.dot SciPy
+                    # gerektirdiği için çekirdeğin dışında yapılır. Ortalama ve
+                    # sapma float64'te biriktirilir
+                    portfolio_returns = (returns @ weights).astype(np.float64)
+                    daily_vol, sharpe = _risk_stats(portfolio_returns, self.config.risk_free_rate / 252)
                     self.metrics.volatility_monthly = daily_vol * np.sqrt(21) * 100
                     
-                    daily_rf = self.config.risk_free_rate / 252
-                    excess_return = portfolio_returns.mean() - daily_rf
-                    
                     if daily_vol > 0:
-                        self.metrics.sharpe_ratio = (excess_return / daily_vol) * np.sqrt(252)
-                
+                        self.metrics.sharpe_ratio = sharpe
+            
+            self._risk_key = risk_key
+            self._risk_snapshot = (self.metrics.volatility_monthly, self.metrics.sharpe_ratio)
+        
         except Exception as e:
             logger.error(f"Risk hesaplama hatası: {e}")
     
     def get_summary_dataframe(self) -> pd.DataFrame:
         """Özet DataFrame döndür."""
-        data = []
-        
-        for asset in self.assets:
-            data.append({
-                'Kod': asset.code,
-                'Tür': asset.asset_type,
-                'İsim': asset.name[:25] + '...' if len(asset.name) > 25 else asset.name,
-                'Adet': asset.shares,
-                'Fiyat': asset.current_price,
-                'Birim': asset.currency,
-                'Değer (TRY)': asset.value_try,
-                'Ağırlık (%)': asset.actual_weight,
-                'Hedef (%)': asset.target_weight,
-                'Sapma (%)': asset.weight_deviation,
-                'Haftalık (%)': asset.weekly_return,
-                'Nakit': '✓' if asset.is_cash_reserve else ''
-            })
-        
-        return pd.DataFrame(data)
+        soa = self._soa
+        if not soa or not len(soa['code']):
+            return pd.DataFrame()
+        
+        df = pd.DataFrame({label: soa[key] for key, label in _SUMMARY_COL_MAP.items()})
+        # Az sayıda tekrar eden değer: karşılaştırmalar int kod üzerinden
+        df['Tür'] = df['Tür'].astype('category')
+        df['Nakit'] = pd.Categorical(np.where(soa['is_cash'], '✓', ''))
+        return df
     
     def get_cash_reserve_breakdown(self) -> pd.DataFrame:
         """Nakit rezervi dağılımı."""
-        data = []
+        soa = self._soa
+        if not soa or 'valid' not in soa:
+            return pd.DataFrame()
         
-        for asset in self.assets:
-            if asset.is_cash_reserve and asset.is_valid:
-                data.append({
-                    'Kod': asset.code,
-                    'İsim': asset.name,
-                    'Değer (TRY)': asset.value_try
-                })
+        mask = soa['is_cash'] & soa['valid']
+        if not mask.any():
+            return pd.DataFrame()
         
-        return pd.DataFrame(data)
+        return pd.DataFrame({
+            'Kod': soa['code'][mask],
+            'İsim': soa['name'][mask],
+            'Değer (TRY)': soa['value_try'][mask]
+        })
     
     def get_correlation_matrix(self) -> Optional[pd.DataFrame]:
         """Korelasyon matrisi."""
-        all_returns = []
-        
-        for asset in self.assets:
-            if not asset.is_valid or asset.asset_type == "CASH":
-                continue
-            
-            try:
-                if asset.asset_type == "TEFAS":
-                    hist = fetch_tefas_history(asset.code, days=30)
-                elif asset.asset_type == "US_STOCK":
-                    hist = fetch_us_stock_history(asset.code, days=30)
-                elif asset.asset_type == "CRYPTO":
-                    symbol = f"{asset.code}/USDT"
-                    hist = fetch_crypto_history(symbol, days=30)
-                else:
-                    continue
-                
-                if hist is not None and len(hist) > 5:
-                    returns = hist['Close'].pct_change().dropna()
-                    all_returns.append({'code': asset.code, 'returns': returns})
-            except:
-                continue
+        codes, _, prices = self._price_matrix(days=30)
         
-        if len(all_returns) < 2:
+        if len(codes) < 2 or len(prices) < 3:
             return None
         
-        returns_df = pd.DataFrame()
-        for item in all_returns:
-            returns_df[item['code']] = item['returns']
-        
-        return returns_df.corr()
+        returns = _daily_returns(prices)
+        # Sabit fiyatlı kolonlar pandas'taki gibi NaN korelasyon verir
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = np.corrcoef(returns, rowvar=False, dtype=np.float32)
+        return pd.DataFrame(corr, index=codes, columns=codes)
     
     def get_history_data(self, asset_code: str, days: int = 30) -> pd.DataFrame:
         """Varlık geçmiş verisi."""
-        asset = next((a for a in self.assets if a.code == asset_code), None)
+        asset = self._assets_by_code.get(asset_code)
         
         if not asset:
             return pd.DataFrame(columns=['Date', 'Close'])
         
-        if asset.asset_type == "TEFAS":
-            return fetch_tefas_history(asset_code, days)
-        elif asset.asset_type == "US_STOCK":
-            return fetch_us_stock_history(asset_code, days)
-        elif asset.asset_type == "CRYPTO":
-            return fetch_crypto_history(f"{asset_code}/USDT", days)
+        fetcher = _HIST_FETCHERS.get(asset.asset_type)
+        if fetcher:
+            # Aynı (tür, kod, gün) isteği varlık sınıfının history_ttl'i
+            # içinde ağa tekrar gitmez (_closes_cache ile aynı tazelik)
+            key = (asset.asset_type, asset_code, days)
+            memo = self._history_memo.get(key)
+            if memo and time.monotonic() < memo[0]:
+                return memo[1].copy()
+            
+            hist = fetcher(asset_code, days)
+            if hist is not None and not hist.empty:
+                self._history_memo[key] = (time.monotonic() + history_ttl(asset.asset_type), hist)
+                return hist.copy()
+            return hist
         elif asset.asset_type == "CASH":
-            dates = pd.date_range(end=datetime.now(), periods=days, freq='D')
-            return pd.DataFrame({'Date': dates, 'Close': [1.0] * days})
+            return _cash_history(date.today(), days).copy()
         
         return pd.DataFrame(columns=['Date', 'Close'])
 
@@ -504,7 +843,8 @@ class Portfolio:
 # YARDIMCI FONKSİYONLAR
 # =============================================================================
 
-def format_currency(value: float, currency: str = "TRY") -> str:
+@lru_cache(maxsize=4096)
+def _format_currency(value: float, currency: str) -> str:
     if currency == "TRY":
         return f"₺{value:,.2f}"
     elif currency in ("USD", "USDT"):
@@ -512,7 +852,18 @@ def format_currency(value: float, currency: str = "TRY") -> str:
     return f"{value:,.2f} {currency}"
 
 
-def format_percentage(value: float, include_sign: bool = True) -> str:
-    if include_sign and value > 0:
+@lru_cache(maxsize=4096)
+def _format_percentage(value: float, plus_sign: bool) -> str:
+    if plus_sign:
         return f"+{value:.2f}%"
     return f"{value:.2f}%"
+
+
+def format_currency(value: float, currency: str = "TRY") -> str:
+    # Gösterim 2 hanelidir; yuvarlanmış değer cache anahtarı olur
+    return _format_currency(round(value, 2), currency)
+
+
+def format_percentage(value: float, include_sign: bool = True) -> str:
+    # İşaret yuvarlanmamış değerden belirlenir (0.004 -> "+0.00%")
+    return _format_percentage(round(value, 2), include_sign and value > 0)
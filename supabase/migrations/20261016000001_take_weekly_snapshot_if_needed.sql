@@ -0,0 +1,23 @@
+-- Haftalik snapshot kontrolu + insert tek round-trip'te.
+-- Bu hafta (ISO hafta) icin kayit yoksa ekler ve true doner, varsa false.
+-- security invoker: RLS politikalari cagiran kullanici icin aynen uygulanir.
+create or replace function public.take_weekly_snapshot_if_needed(
+    p_user_id uuid,
+    p_total_value double precision,
+    p_assets jsonb
+) returns boolean
+language plpgsql
+security invoker
+as $$
+declare
+    v_week integer := extract(week from now())::integer;
+begin
+    insert into public.snapshots (user_id, total_value_try, assets, week_number)
+    select p_user_id, p_total_value, p_assets, v_week
+    where not exists (
+        select 1 from public.snapshots
+        where user_id = p_user_id and week_number = v_week
+    );
+    return found;
+end;
+$$;
@@ -0,0 +1,25 @@
+-- Ilk acilista gereken portfolio config'i ve son snapshot'lari tek
+-- round-trip'te dondurur: {"config": ..., "snapshots": [...]} (eskiden yeniye).
+-- portfolios ile snapshots arasinda FK olmadigi icin PostgREST embedding
+-- yerine fonksiyon kullanilir; security invoker ile RLS aynen uygulanir.
+create or replace function public.load_user_bootstrap(
+    p_user_id uuid,
+    p_limit integer default 52
+) returns jsonb
+language sql
+stable
+security invoker
+as $$
+    select jsonb_build_object(
+        'config', (select p.config from public.portfolios p where p.user_id = p_user_id),
+        'snapshots', coalesce((
+            select jsonb_agg(to_jsonb(s) order by s.created_at)
+            from (
+                select * from public.snapshots
+                where user_id = p_user_id
+                order by created_at desc
+                limit p_limit
+            ) s
+        ), '[]'::jsonb)
+    );
+$$;
@@ -0,0 +1,24 @@
+-- load_user_bootstrap artik snapshot'larin buyuk `assets` JSONB'sini
+-- gondermez; sadece grafik icin gereken kolonlar doner.
+create or replace function public.load_user_bootstrap(
+    p_user_id uuid,
+    p_limit integer default 52
+) returns jsonb
+language sql
+stable
+security invoker
+as $$
+    select jsonb_build_object(
+        'config', (select p.config from public.portfolios p where p.user_id = p_user_id),
+        'snapshots', coalesce((
+            select jsonb_agg(to_jsonb(s) order by s.created_at)
+            from (
+                select id, created_at, total_value_try, week_number
+                from public.snapshots
+                where user_id = p_user_id
+                order by created_at desc
+                limit p_limit
+            ) s
+        ), '[]'::jsonb)
+    );
+$$;
@@ -0,0 +1,7 @@
+-- load_snapshots / get_latest_snapshot / load_user_bootstrap:
+-- eq(user_id) order(created_at desc) limit N -> siralamasiz index range scan.
+-- include kolonlari projeksiyonu (id, created_at, total_value_try,
+-- week_number) kapsar; index-only scan mumkun olur.
+create index if not exists snapshots_user_created_desc
+    on public.snapshots (user_id, created_at desc)
+    include (id, total_value_try, week_number);
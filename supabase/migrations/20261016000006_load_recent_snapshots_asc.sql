@@ -0,0 +1,19 @@
+-- Son N snapshot'i eskiden yeniye sirali dondurur; istemci tarafinda
+-- ters cevirme gerekmez. Kolonlar load_snapshots projeksiyonuyla ayni.
+create or replace function public.load_recent_snapshots_asc(
+    p_user_id uuid,
+    p_limit integer default 52
+) returns jsonb
+language sql
+stable
+security invoker
+as $$
+    select coalesce(jsonb_agg(to_jsonb(s) order by s.created_at), '[]'::jsonb)
+    from (
+        select id, created_at, total_value_try, week_number
+        from public.snapshots
+        where user_id = p_user_id
+        order by created_at desc
+        limit p_limit
+    ) s;
+$$;
@@ -0,0 +1,9 @@
+-- Kullanicinin tum snapshot'larini tek transaction'da siler.
+-- Ileride reset sonrasi seed vb. adimlar ayni fonksiyona eklenebilir.
+create or replace function public.reset_snapshots(p_user_id uuid)
+returns void
+language sql
+security invoker
+as $$
+    delete from public.snapshots where user_id = p_user_id;
+$$;
@@ -0,0 +1,11 @@
+-- updated_at istemciden gonderilmez: insert'te default, upsert'in update
+-- dalinda moddatetime trigger'i ile sunucuda set edilir.
+create extension if not exists moddatetime schema extensions;
+
+alter table public.portfolios
+    alter column updated_at set default now();
+
+drop trigger if exists set_updated_at on public.portfolios;
+create trigger set_updated_at
+    before update on public.portfolios
+    for each row execute function extensions.moddatetime(updated_at);
@@ -0,0 +1,38 @@
+-- Kullanici basina ISO hafta (yil + hafta) icin tek snapshot. "insert ...
+-- where not exists" iki oturum arasinda atomik degildi; benzersiz indeks +
+-- on conflict do nothing ile ayni haftaya ikinci kayit yazilamaz.
+-- week_number yil icermedigi icin anahtar created_at'ten (UTC) turetilir.
+
+-- Mevcut tekrarlar: haftanin ilk snapshot'i kalir
+delete from public.snapshots s
+using public.snapshots d
+where s.user_id = d.user_id
+  and extract(isoyear from (s.created_at at time zone 'UTC')) = extract(isoyear from (d.created_at at time zone 'UTC'))
+  and extract(week from (s.created_at at time zone 'UTC')) = extract(week from (d.created_at at time zone 'UTC'))
+  and (s.created_at, s.id) > (d.created_at, d.id);
+
+create unique index if not exists snapshots_user_iso_week_uniq
+    on public.snapshots (
+        user_id,
+        (extract(isoyear from (created_at at time zone 'UTC'))),
+        (extract(week from (created_at at time zone 'UTC')))
+    );
+
+create or replace function public.take_weekly_snapshot_if_needed(
+    p_user_id uuid,
+    p_total_value double precision,
+    p_assets jsonb
+) returns boolean
+language plpgsql
+security invoker
+as $$
+begin
+    insert into public.snapshots (user_id, total_value_try, assets, week_number)
+    values (
+        p_user_id, p_total_value, p_assets,
+        extract(week from (now() at time zone 'UTC'))::integer
+    )
+    on conflict do nothing;
+    return found;
+end;
+$$;
@@ -9,11 +9,28 @@ Tarih: Ocak 2026
 """
 
 import logging
-from datetime import datetime
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
 from typing import Optional
 
+import httpx
 import streamlit as st
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+
+# HTTP/2 icin h2 paketi gerekli; yoksa HTTP/1.1 keep-alive ile devam
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# orjson import (opsiyonel - istek govdesi serilestirmesi icin)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
@@ -25,9 +42,52 @@ if not SUPABASE_KEY:
     SUPABASE_KEY = "sb_publishable_KRs5qGHDBj9EKdi7lWUIrA_LlWSirRN"
 
 
+class _OrjsonClient(httpx.Client):
+    """JSON istek govdelerini stdlib json yerine orjson ile serilestiren client."""
+    
+    def build_request(self, method, url, *, content=None, json=None, headers=None, **kwargs):
+        if json is not None and content is None:
+            content = orjson.dumps(json, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+            headers = httpx.Headers(headers)
+            headers['Content-Type'] = 'application/json'
+            json = None
+        return super().build_request(method, url, content=content, json=json, headers=headers, **kwargs)
+
+
+@st.cache_resource(show_spinner=False)
 def get_supabase_client() -> Client:
-    """Supabase client olustur."""
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+    """
+    Veritabani islemleri icin paylasilan Supabase client (process basina bir).
+    
+    Bu client ile giris yapilmaz; auth islemleri get_auth_client'i kullanir,
+    boylece bir kullanicinin oturumu digerlerinin sorgularina tasinmaz.
+    Sabit boyutlu keep-alive havuzu sayesinde sorgular ayni TLS
+    baglantisini tekrar kullanir.
+    """
+    client_cls = _OrjsonClient if ORJSON_AVAILABLE else httpx.Client
+    http_client = client_cls(
+        transport=httpx.HTTPTransport(
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=20, keepalive_expiry=60.0),
+            http2=HTTP2_AVAILABLE,
+        ),
+        timeout=10.0,
+        follow_redirects=True,
+    )
+    return create_client(SUPABASE_URL, SUPABASE_KEY, options=ClientOptions(httpx_client=http_client))
+
+
+def get_auth_client() -> Client:
+    """
+    Auth islemleri icin Supabase client (Streamlit oturumu basina bir).
+    
+    sign_in oturumu client uzerinde sakladigi icin process genelinde
+    paylasilmaz.
+    """
+    client = st.session_state.get('_supabase_auth_client')
+    if client is None:
+        client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        st.session_state._supabase_auth_client = client
+    return client
 
 
 def init_auth_state():
@@ -77,7 +137,7 @@ def render_login_form():
     """Giris formu."""
     st.markdown("### Giris Yap")
     
-    supabase = get_supabase_client()
+    supabase = get_auth_client()
     
     email = st.text_input("Email", placeholder="ornek@email.com", key="login_email")
     password = st.text_input("Sifre", type="password", placeholder="********", key="login_password")
@@ -103,6 +163,7 @@ def render_login_form():
                         'name': result.user.user_metadata.get('full_name', result.user.email)
                     }
                     st.session_state.access_token = result.session.access_token
+                    prefetch_user_bootstrap(result.user.id)
                     st.success("Giris basarili!")
                     st.rerun()
                 else:
@@ -130,7 +191,7 @@ def render_register_form():
     """Kayit formu."""
     st.markdown("### Kayit Ol")
     
-    supabase = get_supabase_client()
+    supabase = get_auth_client()
     
     email = st.text_input("Email", placeholder="ornek@email.com", key="reg_email")
     password = st.text_input("Sifre", type="password", placeholder="En az 6 karakter", key="reg_password")
@@ -183,7 +244,7 @@ def render_forgot_password_form():
     st.markdown("### Sifremi Unuttum")
     st.info("Email adresinize sifre sifirlama linki gonderilecek.")
     
-    supabase = get_supabase_client()
+    supabase = get_auth_client()
     
     email = st.text_input("Email", placeholder="ornek@email.com", key="forgot_email")
     
@@ -215,11 +276,13 @@ def handle_oauth_callback():
 def logout():
     """Cikis yap."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_auth_client()
         supabase.auth.sign_out()
     except:
         pass
     
+    st.session_state.pop('_supabase_auth_client', None)
+    st.session_state.pop('_bootstrap_prefetch', None)
     st.session_state.user = None
     st.session_state.access_token = None
     st.session_state.config = None
@@ -231,6 +294,58 @@ def logout():
 # DATABASE OPERATIONS
 # =============================================================================
 
+# Okumalar st.cache_data ile kullanici bazinda onbelleklenir; hata firlatan
+# cagrilar cache'lenmez, bu yuzden sorgular ic fonksiyonlarda yapilir ve
+# hatalar disaridaki public fonksiyonda yakalanir. Yazmalar ilgili cache'i
+# temizler.
+_CONFIG_TTL = 300
+_SNAPSHOT_TTL = 600
+# Snapshot cache'i kullanici basina tek anahtar tutar (yazmalarda kullanici
+# bazli temizlenebilsin diye); daha kucuk limitler bu listeden kesilir
+_SNAPSHOT_LIMIT = 52
+
+# Grafik/benchmark icin yeterli kolonlar; buyuk `assets` JSONB'si okunmaz
+_SNAPSHOT_COLUMNS = 'id, created_at, total_value_try, week_number'
+
+
+@st.cache_data(ttl=_CONFIG_TTL, show_spinner=False)
+def _select_portfolio_config(user_id: str) -> Optional[dict]:
+    # maybe_single: satir yoksa exception yerine None doner
+    result = get_supabase_client().table('portfolios').select('config').eq('user_id', user_id).maybe_single().execute()
+    return result.data['config'] if result and result.data else None
+
+
+def _query_snapshots(user_id: str, limit: int) -> list:
+    supabase = get_supabase_client()
+    try:
+        # Son `limit` kayit sunucuda eskiden yeniye siralanmis gelir
+        result = supabase.rpc('load_recent_snapshots_asc', {
+            'p_user_id': user_id,
+            'p_limit': limit,
+        }).execute()
+        return result.data or []
+    except Exception as e:
+        logger.warning(f"load_recent_snapshots_asc RPC kullanilamadi: {e}")
+    
+    result = supabase.table('snapshots')\
+        .select(_SNAPSHOT_COLUMNS)\
+        .eq('user_id', user_id)\
+        .order('created_at', desc=True)\
+        .limit(limit)\
+        .execute()
+    return list(reversed(result.data)) if result.data else []
+
+
+@st.cache_data(ttl=_SNAPSHOT_TTL, show_spinner=False)
+def _select_snapshots(user_id: str) -> list:
+    return _query_snapshots(user_id, _SNAPSHOT_LIMIT)
+
+
+def _clear_snapshot_caches(user_id: str) -> None:
+    """Snapshot yazma/silme sonrasi kullanicinin okuma cache'lerini temizle."""
+    _select_snapshots.clear(user_id)
+
+
 def save_portfolio_config(user_id: str, config: dict) -> bool:
     """Portfolio config'ini kaydet."""
     try:
@@ -239,28 +354,21 @@ def save_portfolio_config(user_id: str, config: dict) -> bool:
         result = supabase.table('portfolios').upsert({
             'user_id': user_id,
             'config': config,
-            'updated_at': datetime.now().isoformat()
         }, on_conflict='user_id').execute()
         
-        return True
-        
     except Exception as e:
         logger.error(f"Config kaydetme hatasi: {e}")
         return False
+    
+    # Yazma basarili; cache temizligi donus degerini etkilemez
+    _select_portfolio_config.clear(user_id)
+    return True
 
 
 def load_portfolio_config(user_id: str) -> Optional[dict]:
     """Portfolio config'ini yukle."""
     try:
-        supabase = get_supabase_client()
-        
-        result = supabase.table('portfolios').select('config').eq('user_id', user_id).single().execute()
-        
-        if result.data:
-            return result.data['config']
-        
-        return None
-        
+        return _select_portfolio_config(user_id)
     except Exception as e:
         logger.error(f"Config yukleme hatasi: {e}")
         return None
@@ -275,79 +383,191 @@ def save_snapshot(user_id: str, total_value: float, assets: dict) -> bool:
             'user_id': user_id,
             'total_value_try': total_value,
             'assets': assets,
-            'week_number': datetime.now().isocalendar()[1]
+            'week_number': datetime.now().isocalendar()[1],
         }).execute()
         
-        return True
-        
     except Exception as e:
         logger.error(f"Snapshot kaydetme hatasi: {e}")
         return False
+    
+    _clear_snapshot_caches(user_id)
+    return True
 
 
-def load_snapshots(user_id: str, limit: int = 52) -> list:
+def load_snapshots(user_id: str, limit: int = _SNAPSHOT_LIMIT) -> list:
     """Kullanicinin snapshot'larini yukle."""
-    try:
-        supabase = get_supabase_client()
-        
-        result = supabase.table('snapshots')\
-            .select('*')\
-            .eq('user_id', user_id)\
-            .order('created_at', desc=True)\
-            .limit(limit)\
-            .execute()
-        
-        if result.data:
-            return list(reversed(result.data))
-        
+    if limit <= 0:
         return []
-        
+    try:
+        if limit <= _SNAPSHOT_LIMIT:
+            return _select_snapshots(user_id)[-limit:]
+        return _query_snapshots(user_id, limit)
     except Exception as e:
         logger.error(f"Snapshot yukleme hatasi: {e}")
         return []
 
 
-def get_latest_snapshot(user_id: str) -> Optional[dict]:
-    """En son snapshot'i getir."""
+def _summarize_snapshots(snapshots: list) -> dict:
+    # Liste eskiden yeniye sirali; bu haftanin kaydi varsa en sondadir.
+    # week_number yil icermedigi icin gecen yilin ayni haftasiyla karismasin
+    # diye (ISO yil, hafta) created_at'ten alinir
+    has_current = False
+    if snapshots:
+        created = datetime.fromisoformat(snapshots[-1]['created_at']).astimezone()
+        has_current = created.isocalendar()[:2] == datetime.now().isocalendar()[:2]
+    
+    return {
+        'snapshots': snapshots,
+        'current_week_has_snapshot': has_current,
+    }
+
+
+def load_snapshot_summary(user_id: str, limit: int = _SNAPSHOT_LIMIT) -> dict:
+    """
+    Snapshot listesi ve bu hafta snapshot alinip alinmadigini tek
+    sorguyla dondur.
+    
+    Son `limit` kayit bu haftanin kaydini da icerdigi icin haftalik kontrol
+    ayrica sorgulanmaz.
+    """
+    return _summarize_snapshots(load_snapshots(user_id, limit))
+
+
+# cache_data fonksiyonlari ayni anahtar icin zaten tek hesaplama yapar
+# (Streamlit'in anahtar bazli kilidi); cache'siz bootstrap RPC'si icin ayni
+# kullanicinin es zamanli istekleri (coklu sekme) tek Future'i paylasir.
+_IN_FLIGHT: dict = {}
+_IN_FLIGHT_LOCK = threading.Lock()
+
+
+def _single_flight(key, fn, *args):
+    with _IN_FLIGHT_LOCK:
+        future = _IN_FLIGHT.get(key)
+        owner = future is None
+        if owner:
+            future = _IN_FLIGHT[key] = Future()
+    if not owner:
+        return future.result()
+    try:
+        future.set_result(fn(*args))
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _IN_FLIGHT_LOCK:
+            del _IN_FLIGHT[key]
+    return future.result()
+
+
+def _fetch_user_bootstrap(user_id: str, limit: int) -> dict:
+    return _single_flight(('bootstrap', user_id, limit), _query_user_bootstrap, user_id, limit)
+
+
+def _query_user_bootstrap(user_id: str, limit: int) -> dict:
+    # session_state'e dokunmaz; prefetch thread'inde de calisabilir
     try:
         supabase = get_supabase_client()
         
-        result = supabase.table('snapshots')\
-            .select('*')\
-            .eq('user_id', user_id)\
-            .order('created_at', desc=True)\
-            .limit(1)\
-            .single()\
-            .execute()
+        result = supabase.rpc('load_user_bootstrap', {
+            'p_user_id': user_id,
+            'p_limit': limit,
+        }).execute()
         
-        return result.data
+        data = result.data or {}
+        summary = _summarize_snapshots(data.get('snapshots') or [])
+        summary['config'] = data.get('config')
+        return summary
         
     except Exception as e:
-        return None
+        logger.warning(f"load_user_bootstrap RPC kullanilamadi: {e}")
+    
+    summary = load_snapshot_summary(user_id, limit)
+    summary['config'] = load_portfolio_config(user_id)
+    return summary
+
+
+# Giris sonrasi bootstrap sorgusu, st.rerun ile dashboard'un ilk render'i
+# arasinda arka planda calisir
+_PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="supabase-prefetch")
+
+
+def prefetch_user_bootstrap(user_id: str, limit: int = _SNAPSHOT_LIMIT) -> None:
+    """Bootstrap sorgusunu arka planda baslat; sonucu load_user_bootstrap alir."""
+    get_supabase_client()  # cache_resource'u ana thread'de isit
+    st.session_state._bootstrap_prefetch = (
+        user_id, limit, _PREFETCH_EXECUTOR.submit(_fetch_user_bootstrap, user_id, limit))
 
 
-def should_take_weekly_snapshot(user_id: str) -> bool:
-    """Bu hafta snapshot alinmis mi kontrol et."""
-    today = datetime.now()
+def load_user_bootstrap(user_id: str, limit: int = _SNAPSHOT_LIMIT) -> dict:
+    """
+    Ilk render icin config + snapshot ozetini tek RPC ile getir
+    (supabase/migrations/*_load_user_bootstrap.sql). Fonksiyon veritabaninda
+    yoksa load_portfolio_config + load_snapshot_summary'ye duser.
+    Giriste baslatilmis bir prefetch varsa onun sonucu kullanilir.
+    """
+    prefetch = st.session_state.pop('_bootstrap_prefetch', None)
+    if prefetch and prefetch[:2] == (user_id, limit):
+        return prefetch[2].result()
+    return _fetch_user_bootstrap(user_id, limit)
+
+
+def _has_weekly_snapshot(user_id: str) -> bool:
+    """Bu ISO hafta icin snapshot var mi; sorgu hatalari yukari firlatilir."""
+    supabase = get_supabase_client()
     
-    if today.weekday() != 4:
-        return False
+    # week_number yil icermedigi icin haftanin basindan (Pazartesi 00:00)
+    # sonraki kayitlara bakilir
+    now = datetime.now().astimezone()
+    week_start = (now - timedelta(days=now.weekday()))\
+        .replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    result = supabase.table('snapshots')\
+        .select('id')\
+        .eq('user_id', user_id)\
+        .gte('created_at', week_start.isoformat())\
+        .limit(1)\
+        .execute()
     
-    current_week = today.isocalendar()[1]
+    return len(result.data) > 0
+
+
+def take_weekly_snapshot_if_needed(user_id: str, total_value: float, assets: dict) -> Optional[bool]:
+    """
+    Cuma gunu, bu hafta snapshot yoksa kaydet. Kontrol + insert tek RPC ile
+    yapilir (supabase/migrations/*_take_weekly_snapshot_if_needed.sql).
+    Fonksiyon veritabaninda yoksa eski iki sorguluk yola duser.
+    
+    True: kaydedildi, False: bu hafta zaten var (veya Cuma degil),
+    None: sorgu/kayit hatasi; durum bilinmiyor.
+    """
+    if datetime.now().weekday() != 4:
+        return False
     
     try:
         supabase = get_supabase_client()
         
-        result = supabase.table('snapshots')\
-            .select('week_number')\
-            .eq('user_id', user_id)\
-            .eq('week_number', current_week)\
-            .execute()
-        
-        return len(result.data) == 0
+        result = supabase.rpc('take_weekly_snapshot_if_needed', {
+            'p_user_id': user_id,
+            'p_total_value': total_value,
+            'p_assets': assets,
+        }).execute()
         
     except Exception as e:
-        return False
+        logger.warning(f"take_weekly_snapshot_if_needed RPC kullanilamadi: {e}")
+    
+    else:
+        taken = bool(result.data)
+        if taken:
+            _clear_snapshot_caches(user_id)
+        return taken
+    
+    try:
+        if _has_weekly_snapshot(user_id):
+            return False
+    except Exception as e:
+        logger.error(f"Haftalik snapshot kontrol hatasi: {e}")
+        return None
+    return save_snapshot(user_id, total_value, assets) or None
 
 
 def delete_all_snapshots(user_id: str) -> bool:
@@ -355,10 +575,15 @@ def delete_all_snapshots(user_id: str) -> bool:
     try:
         supabase = get_supabase_client()
         
-        supabase.table('snapshots').delete().eq('user_id', user_id).execute()
-        
-        return True
+        try:
+            supabase.rpc('reset_snapshots', {'p_user_id': user_id}).execute()
+        except Exception as e:
+            logger.warning(f"reset_snapshots RPC kullanilamadi: {e}")
+            supabase.table('snapshots').delete().eq('user_id', user_id).execute()
         
     except Exception as e:
         logger.error(f"Snapshot silme hatasi: {e}")
         return False
+    
+    _clear_snapshot_caches(user_id)
+    return True